@@ -34,10 +34,18 @@ import logging
 import os
 from typing import Any, Dict, Tuple
 
+import orjson
 from flask import Flask, Response, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 
-from lib.processor import process_html
+if __package__:
+    # Imported as part of the repository package, e.g. ``python.app`` from the tests
+    from .lib.processor import process_html
+else:
+    # Run from python/ as ``python app.py`` or ``gunicorn app:app``
+    from lib.processor import process_html
 
 # Configure logging
 logging.basicConfig(
@@ -50,7 +58,33 @@ logger = logging.getLogger(__name__)
 MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB maximum HTML size
 MAX_JSON_SIZE = 15 * 1024 * 1024  # 15MB maximum JSON payload
 
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    Large HTML payloads make JSON (de)serialization a significant part of the
+    request cost, so all endpoints encode and decode through orjson instead of
+    the stdlib json module. msgspec or cysimdjson could be dropped in here the
+    same way if orjson is not available on a platform.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as a JSON string."""
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        """Deserialize data from a JSON string or bytes."""
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Serialize the given arguments directly into a JSON response."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Set maximum content length for the application
@@ -144,6 +178,27 @@ def create_success_response(result: str) -> Tuple[Response, int]:
     return jsonify({"result": result, "success": True}), 200
 
 
+def warm_up() -> None:
+    """
+    Run a small document through the pipeline once at startup.
+
+    Importing the module does not call this; it runs from the ``__main__``
+    path below and from the ``post_worker_init`` hook in gunicorn.conf.py.
+
+    The first call pays one-time, process-wide costs (lazy imports, regex
+    compilation, lxml setup) that would otherwise land on the first request
+    each worker serves. The per-thread Parser and pysbd segmenters are only
+    built for the calling thread, so in threaded servers (the Flask dev
+    server, gunicorn gthread workers) every other request thread still builds
+    its own on its first request.
+    """
+    try:
+        process_html("<html><body><p>Warm up. Second sentence.</p></body></html>")
+    except Exception as e:
+        # A failed warm-up only costs latency; requests still report their own errors
+        logger.warning(f"Pipeline warm-up failed: {e}")
+
+
 @app.route("/textp", methods=["POST"])
 def process_text() -> Tuple[Response, int]:
     """
@@ -194,10 +249,15 @@ def process_text() -> Tuple[Response, int]:
             415
         )
 
-    # Parse and validate JSON
+    # Parse and validate JSON; the raw body is not cached on the request
     try:
-        data = request.get_json(silent=True)
-    except Exception as e:
+        data = orjson.loads(request.get_data(cache=False))
+    except RequestEntityTooLarge:
+        logger.warning("Request rejected: payload exceeds MAX_CONTENT_LENGTH")
+        return create_error_response(
+            f"Request payload exceeds maximum allowed size ({MAX_JSON_SIZE // (1024*1024)}MB)", 413
+        )
+    except orjson.JSONDecodeError as e:
         logger.warning(f"JSON parsing failed: {e}")
         return create_error_response("Invalid JSON payload", 400)
 
@@ -266,5 +326,6 @@ if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     debug = os.environ.get("FLASK_DEBUG", "false").lower() == "true"
 
+    warm_up()
     logger.info(f"Starting Flask server on port {port} (debug={debug})")
     app.run(host="0.0.0.0", port=port, debug=debug)
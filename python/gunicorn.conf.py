@@ -0,0 +1,14 @@
+"""
+gunicorn settings for the HTML processing service.
+
+gunicorn loads this file automatically when started from python/::
+
+    $ gunicorn -w 4 -b 0.0.0.0:8000 app:app
+"""
+
+
+def post_worker_init(worker):
+    """Warm up the pipeline in each worker before it accepts requests."""
+    from app import warm_up
+
+    warm_up()
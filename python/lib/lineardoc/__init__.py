@@ -4,10 +4,10 @@ Lineardoc module - Linear document representation for HTML.
 
 from .builder import Builder
 from .contextualizer import Contextualizer
-from .doc import Doc
+from .doc import Doc, DocItem
 from .mw_contextualizer import mw_contextualizer
 from .normalizer import Normalizer
-from .parser import Parser
+from .parser import ParseError, Parser
 from .text_block import text_block
 from .text_chunk import text_chunk
 from .util import get_prop
@@ -17,10 +17,12 @@ __all__ = [
     "text_chunk",
     "text_block",
     "Doc",
+    "DocItem",
     "Normalizer",
     "Contextualizer",
     "mw_contextualizer",
     "Builder",
     "Parser",
+    "ParseError",
     "get_prop",
 ]
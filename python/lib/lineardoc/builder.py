@@ -11,6 +11,17 @@ from .text_chunk import text_chunk
 class Builder:
     """A document builder."""
 
+    __slots__ = (
+        "block_tags",
+        "inline_annotation_tags",
+        "inline_annotation_tags_used",
+        "inline_annotation_snapshot",
+        "doc",
+        "text_chunks",
+        "is_block_segmentable",
+        "parent",
+    )
+
     def __init__(self, parent=None, wrapper_tag=None):
         """
         Initialize a Builder.
@@ -24,6 +35,8 @@ class Builder:
         self.inline_annotation_tags = []
         # The height of the annotation tags that have been used, minus one
         self.inline_annotation_tags_used = 0
+        # Copy of inline_annotation_tags shared by the chunks added since the last push/pop
+        self.inline_annotation_snapshot = None
         self.doc = Doc(wrapper_tag)
         self.text_chunks = []
         self.is_block_segmentable = True
@@ -48,12 +61,14 @@ class Builder:
         if self.is_ignored_tag(tag):
             return
         if tag["name"] == "figure":
+            # Editing a tag in place invalidates its cached open tag HTML
             tag["attributes"]["rel"] = "cx:Figure"
+            tag.pop("openTagHtml", None)
         self.doc.add_item("open", tag)
 
     def is_section(self, tag):
         """Check if tag is a section."""
-        return tag["name"] == "section" and tag.get("attributes", {}).get("data-mw-section-id")
+        return tag["name"] == "section" and tag.get("attributes", utils.EMPTY_ATTRIBUTES).get("data-mw-section-id")
 
     def is_ignored_tag(self, tag):
         """Check if tag should be ignored."""
@@ -64,12 +79,11 @@ class Builder:
         # content can be a Doc instance, not just a tag
         if not isinstance(tag, dict):
             return False
-        rel = tag.get("attributes", {}).get("rel", "")
-        return (
-            tag["name"] == "link"
-            and f" {rel} ".find(" mw:PageProp/Category ") != -1
-            and not tag.get("attributes", {}).get("about")
-        )
+        # Only link tags can be categories, so check the name before looking at rel
+        if tag["name"] != "link":
+            return False
+        attributes = tag.get("attributes", utils.EMPTY_ATTRIBUTES)
+        return "mw:PageProp/Category" in attributes.get("rel", "").split() and not attributes.get("about")
 
     def pop_block_tag(self, tag_name):
         """
@@ -99,6 +113,7 @@ class Builder:
     def push_inline_annotation_tag(self, tag):
         """Push an inline annotation tag."""
         self.inline_annotation_tags.append(tag)
+        self.inline_annotation_snapshot = None
 
     def pop_inline_annotation_tag(self, tag_name):
         """Pop an inline annotation tag."""
@@ -106,6 +121,7 @@ class Builder:
             tag = None
         else:
             tag = self.inline_annotation_tags.pop()
+            self.inline_annotation_snapshot = None
 
         if self.inline_annotation_tags_used == len(self.inline_annotation_tags):
             self.inline_annotation_tags_used -= 1
@@ -126,7 +142,7 @@ class Builder:
             chunk_tag = text_chunk.tags[-1] if text_chunk.tags else None
             if not chunk_tag:
                 break
-            if text_chunk.text.strip() or text_chunk.inline_content or chunk_tag is not tag:
+            if (text_chunk.text and not text_chunk.text.isspace()) or text_chunk.inline_content or chunk_tag is not tag:
                 # text_chunk has non whitespace content
                 replace = False
                 break
@@ -145,6 +161,21 @@ class Builder:
                 .add_item("close", tag)
             )
 
+    def get_inline_annotation_snapshot(self):
+        """
+        Get the current inline annotation tags as a list for a new text chunk.
+
+        Chunk tag lists are never mutated, so every chunk added between two
+        pushes/pops shares one copy of the stack.
+
+        Returns:
+            Copy of the inline annotation tag stack
+        """
+        snapshot = self.inline_annotation_snapshot
+        if snapshot is None:
+            snapshot = self.inline_annotation_snapshot = self.inline_annotation_tags[:]
+        return snapshot
+
     def add_text_chunk(self, text, can_segment):
         """
         Add a text chunk.
@@ -153,7 +184,7 @@ class Builder:
             text: Text content
             can_segment: Whether this can be segmented
         """
-        self.text_chunks.append(text_chunk(text, self.inline_annotation_tags[:]))
+        self.text_chunks.append(text_chunk(text, self.get_inline_annotation_snapshot()))
         self.inline_annotation_tags_used = len(self.inline_annotation_tags)
         # Inside a textblock, if a textchunk becomes segmentable
         self.is_block_segmentable = can_segment
@@ -171,7 +202,7 @@ class Builder:
             self.doc.categories.append(content)
             return
 
-        self.text_chunks.append(text_chunk("", self.inline_annotation_tags[:], content))
+        self.text_chunks.append(text_chunk("", self.get_inline_annotation_snapshot(), content))
         self.inline_annotation_tags_used = len(self.inline_annotation_tags)
         if not can_segment:
             self.is_block_segmentable = False
@@ -185,7 +216,8 @@ class Builder:
         whitespace_only = True
 
         for text_chunk in self.text_chunks:
-            if text_chunk.inline_content or text_chunk.text.strip():
+            # isspace() answers the same question as strip() without building a copy
+            if text_chunk.inline_content or (text_chunk.text and not text_chunk.text.isspace()):
                 whitespace_only = False
                 break
             else:
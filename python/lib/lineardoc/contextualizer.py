@@ -46,6 +46,10 @@ class Contextualizer:
         """
         return self.contexts[-1] if self.contexts else None
 
+    def reset(self):
+        """Forget the state of any previous document, keeping the configuration."""
+        self.contexts = []
+
     def on_open_tag(self, open_tag):
         """
         Call when a tag opens.
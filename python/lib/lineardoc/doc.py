@@ -9,14 +9,56 @@ The document is a list of items, where each item is:
 """
 
 import hashlib
+from typing import Any, NamedTuple
 
-from . import util as cxutil
 from . import utils
 
 
+class DocItem(NamedTuple):
+    """One item of a Doc: its type (open|close|blockspace|textblock) and the item itself."""
+
+    type: str
+    item: Any
+
+    def __getitem__(self, key):
+        # Items used to be {"type": ..., "item": ...} dicts; keep that access working
+        if key == "type":
+            return tuple.__getitem__(self, 0)
+        if key == "item":
+            return tuple.__getitem__(self, 1)
+        return tuple.__getitem__(self, key)
+
+
+# Headers whose ids are derived from a hash of their text in Doc.segment
+HEADER_TAGS = frozenset(["h1", "h2", "h3", "h4", "h5"])
+
+
+# Appends one item of each type to a list of HTML fragments, for Doc.write_html
+def write_open_tag_html(html, tag):
+    """Append an open tag, unless Doc.add_item marked it to be left out."""
+    if "skipHtml" not in tag:
+        html.append(utils.get_open_tag_html(tag))
+
+
+def write_close_tag_html(html, tag):
+    """Append a close tag, unless Doc.add_item marked it to be left out."""
+    if "skipHtml" not in tag:
+        html.append(utils.get_close_tag_html(tag))
+
+
+HTML_WRITERS = {
+    "open": write_open_tag_html,
+    "close": write_close_tag_html,
+    "blockspace": lambda html, space: html.append(space),
+    "textblock": lambda html, text_block: text_block.write_html(html),
+}
+
+
 class Doc:
     """An HTML document in linear representation."""
 
+    __slots__ = ("items", "wrapper_tag", "categories")
+
     def __init__(self, wrapper_tag=None):
         """
         Initialize a Doc.
@@ -55,7 +97,11 @@ class Doc:
         Returns:
             Self for chaining
         """
-        self.items.append({"type": item_type, "item": item})
+        if isinstance(item, dict) and item.get("attributes", utils.EMPTY_ATTRIBUTES).get("class") == "cx-segment-block":
+            # Segment block wrappers only group content while parsing; decide once
+            # here that get_html leaves them out, rather than on every render
+            item["skipHtml"] = True
+        self.items.append(DocItem(item_type, item))
         return self
 
     def undo_add_item(self):
@@ -83,8 +129,8 @@ class Doc:
 
         for item in self.items:
             # Ignore all blockspaces, loop till we see a tag opening
-            if item["type"] == "open":
-                return item["item"]
+            if item.type == "open":
+                return item.item
         return None
 
     def segment(self, get_boundaries):
@@ -117,19 +163,15 @@ class Doc:
 
         transclusion_context = None
         for i, item in enumerate(self.items):
-            if item["type"] == "open":
-                tag = utils.clone_open_tag(item["item"])
+            if item.type == "open":
+                tag = utils.clone_open_tag(item.item)
 
-                if tag.get("attributes", {}).get("id"):
+                if tag.get("attributes", utils.EMPTY_ATTRIBUTES).get("id"):
                     # If the item is a header, we make it a fixed length id
-                    if (
-                        tag["name"] in ["h1", "h2", "h3", "h4", "h5"]
-                        and i + 1 < len(self.items)
-                        and self.items[i + 1]["type"] == "textblock"
-                    ):
-                        h = hashlib.sha256()
-                        h.update(self.items[i + 1]["item"].get_plain_text().encode("utf-8"))
-                        tag["attributes"]["id"] = h.hexdigest()[:30]
+                    if tag["name"] in HEADER_TAGS and i + 1 < len(self.items) and self.items[i + 1].type == "textblock":
+                        # sha256 keeps the ids identical to the JS implementation
+                        plain_text = self.items[i + 1].item.get_plain_text()
+                        tag["attributes"]["id"] = hashlib.sha256(plain_text.encode("utf-8")).hexdigest()[:30]
                     elif len(tag["attributes"]["id"]) > 30:
                         tag["attributes"]["id"] = tag["attributes"]["id"][:30]
                 else:
@@ -137,34 +179,34 @@ class Doc:
                     # Section headers (<h2> tags) mark the start of a new section
                     if (
                         i + 1 < len(self.items)
-                        and self.items[i + 1]["type"] == "open"
-                        and self.items[i + 1]["item"].get("name") == "h2"
+                        and self.items[i + 1].type == "open"
+                        and self.items[i + 1].item.get("name") == "h2"
                     ):
                         section_number += 1
 
                 if tag["name"] == "section":
                     tag["attributes"]["data-mw-section-number"] = section_number
 
-                new_doc.add_item(item["type"], tag)
+                new_doc.add_item(item.type, tag)
 
                 # Content of tags that are either mw:Transclusion or mw:Extension need not be segmented
-                about = cxutil.get_prop(["attributes", "about"], tag)
-                typeof = cxutil.get_prop(["attributes", "typeof"], tag)
-                if about and typeof:
+                attributes = tag.get("attributes", utils.EMPTY_ATTRIBUTES)
+                about = attributes.get("about")
+                if about and attributes.get("typeof"):
                     transclusion_context = about
 
-            elif item["type"] == "close":
-                tag = item["item"]
-                about = cxutil.get_prop(["attributes", "about"], tag)
+            elif item.type == "close":
+                tag = item.item
+                about = tag.get("attributes", utils.EMPTY_ATTRIBUTES).get("about")
                 if about and about == transclusion_context:
                     transclusion_context = None
-                new_doc.add_item(item["type"], item["item"])
+                new_doc.add_item(item.type, item.item)
 
-            elif item["type"] != "textblock":
-                new_doc.add_item(item["type"], item["item"])
+            elif item.type != "textblock":
+                new_doc.add_item(item.type, item.item)
 
             else:
-                text_block = item["item"]
+                text_block = item.item
                 new_doc.add_item(
                     "textblock",
                     (
@@ -193,33 +235,32 @@ class Doc:
             HTML document
         """
         html = []
+        self.write_html(html)
+        return "".join(html)
 
-        if self.wrapper_tag:
-            html.append(utils.get_open_tag_html(self.wrapper_tag))
+    def write_html(self, html):
+        """
+        Append the document in HTML format to a list of strings.
 
-        for item in self.items:
-            item_type = item["type"]
-            item_obj = item["item"]
+        Text blocks and their sub-documents write into the same list, so the
+        whole document is joined once instead of once per nesting level.
 
-            if isinstance(item_obj, dict) and item_obj.get("attributes", {}).get("class") == "cx-segment-block":
-                continue
+        Args:
+            html: List that the HTML fragments are appended to
+        """
+        if self.wrapper_tag:
+            html.append(utils.get_open_tag_html(self.wrapper_tag))
 
-            if item_type == "open":
-                html.append(utils.get_open_tag_html(item_obj))
-            elif item_type == "close":
-                html.append(utils.get_close_tag_html(item_obj))
-            elif item_type == "blockspace":
-                html.append(item_obj)
-            elif item_type == "textblock":
-                html.append(item_obj.get_html())
-            else:
-                raise Exception(f"Unknown item type: {item_type}")
+        for item_type, item_obj in self.items:
+            try:
+                write = HTML_WRITERS[item_type]
+            except KeyError:
+                raise Exception(f"Unknown item type: {item_type}") from None
+            write(html, item_obj)
 
         if self.wrapper_tag:
             html.append(utils.get_close_tag_html(self.wrapper_tag))
 
-        return "".join(html)
-
     def wrap_sections(self):
         """
         Wrap the content into sections.
@@ -235,12 +276,18 @@ class Doc:
         # Copy the categories already collected
         new_doc.categories = self.categories
 
+        # Tag ids by tag identity; every tag looked up here is kept alive by self.items
+        tag_ids = {}
+
         def get_tag_id(tag):
             """Get something that can identify the tag."""
-            tag_id = None
-            if tag.get("attributes"):
-                tag_id = tag["attributes"].get("about") or tag["attributes"].get("id")
-            return tag_id or tag["name"]
+            key = id(tag)
+            tag_id = tag_ids.get(key)
+            if tag_id is None:
+                if tag.get("attributes"):
+                    tag_id = tag["attributes"].get("about") or tag["attributes"].get("id")
+                tag_id = tag_ids[key] = tag_id or tag["name"]
+            return tag_id
 
         def open_section(doc):
             doc.add_item("open", {"name": "section", "attributes": {"rel": "cx:Section"}})
@@ -253,17 +300,16 @@ class Doc:
 
         def insert_to_prev_section(item, doc):
             nonlocal curr_section, prev_section
-            if new_doc.get_current_item()["item"]["name"] != "section":
+            if new_doc.get_current_item().item["name"] != "section":
                 raise Exception(f"Sectionwrap: Attempting to remove a non-section tag: {item['name']}")
             # Undo last section close
             doc.undo_add_item()
             curr_section = prev_section
-            doc.add_item(item["type"], item["item"])
+            doc.add_item(item.type, item.item)
             close_section(new_doc)
 
         for item in self.items:
-            item_obj = item["item"]
-            item_type = item["type"]
+            item_type, item_obj = item
 
             if not in_body:
                 # Till we reach body, keep on adding items to new_doc
@@ -296,7 +342,7 @@ class Doc:
                     close_section(new_doc)
 
             elif item_type == "blockspace":
-                if prev_section and new_doc.get_current_item()["item"]["name"] == "section":
+                if prev_section and new_doc.get_current_item().item["name"] == "section":
                     insert_to_prev_section(item, new_doc)
                 else:
                     new_doc.add_item(item_type, item_obj)
@@ -348,9 +394,7 @@ class Doc:
         if self.wrapper_tag:
             dump.append(f"{pad}<cxwrapper>")
 
-        for item in self.items:
-            item_type = item["type"]
-            item_obj = item["item"]
+        for item_type, item_obj in self.items:
 
             if item_type == "open":
                 tag = item_obj
@@ -392,9 +436,9 @@ class Doc:
         segments = []
 
         for item in self.items:
-            if item["type"] != "textblock":
+            if item.type != "textblock":
                 continue
-            text_block = item["item"]
+            text_block = item.item
             segments.append(text_block.get_html())
 
         return segments
@@ -4,31 +4,53 @@ Contextualizer for MediaWiki DOM HTML.
 See https://www.mediawiki.org/wiki/Specs/HTML
 """
 
-import json
 import re
 
+import orjson
+
 from . import util as cxutil
 from .contextualizer import Contextualizer
-
-CONTENT_BRANCH_NODE_NAMES = [
-    "blockquote",
-    "h1",
-    "h2",
-    "h3",
-    "h4",
-    "h5",
-    "h6",
-    "p",
-    "pre",
-    "div",
-    "table",
-    "ol",
-    "ul",
-    "dl",
-    "figure",
-    "center",
-    "section",
-]
+from .utils import EMPTY_ATTRIBUTES
+
+CONTENT_BRANCH_NODE_NAMES = frozenset(
+    [
+        "blockquote",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "p",
+        "pre",
+        "div",
+        "table",
+        "ol",
+        "ul",
+        "dl",
+        "figure",
+        "center",
+        "section",
+    ]
+)
+
+# Child context by parent context and tag name, for tags that are not removable,
+# verbatim, figures or media spans. Tag names not listed keep the parent context.
+CHILD_CONTEXTS = {
+    # Immediate children of body are sections, and ContentBranchNodes are contentBranch
+    None: {"body": "section", **dict.fromkeys(CONTENT_BRANCH_NODE_NAMES, "contentBranch")},
+    "section": dict.fromkeys(CONTENT_BRANCH_NODE_NAMES, "contentBranch"),
+    # And figure//figcaption is contentBranch
+    "media": {"figcaption": "contentBranch"},
+    "media-inline": {"figcaption": "contentBranch"},
+}
+NO_TRANSITIONS = {}
+
+TRANSCLUSION_TYPE_RE = re.compile(r"(^|\s)(mw:Transclusion|mw:Placeholder)\b")
+MEDIA_TYPE_RE = re.compile(r"(^|\s)(mw:File|mw:Image|mw:Video|mw:Audio)\b")
+
+# Marks a tag whose data-mw has not been parsed yet
+_UNPARSED = object()
 
 
 class mw_contextualizer(Contextualizer):
@@ -42,42 +64,54 @@ class mw_contextualizer(Contextualizer):
             config: Config dict with removableSections containing array of classes and rdfa values
         """
         super().__init__(config)
-        # Array holding transclusion fragment ids (about attribute values)
-        self.removable_transclusion_fragments = []
+        # Set of transclusion fragment ids (about attribute values)
+        self.removable_transclusion_fragments = set()
+        # removableSections is read once here: is_removable runs for every tag
+        removable_sections = self.config.get("removableSections") or {}
+        self.has_removable_sections = bool(removable_sections)
+        self.removable_classes = removable_sections.get("classes", [])
+        self.removable_rdfa = removable_sections.get("rdfa", [])
+        # Removable template matchers, compiled once: (regexp, None) for /regexp/ entries, else (None, lowercased name)
+        self.removable_templates = []
+        for removable_template in removable_sections.get("templates", []):
+            if removable_template.startswith("/") and removable_template.endswith("/"):
+                # A regular expression is given
+                self.removable_templates.append((re.compile(removable_template[1:-1], re.IGNORECASE), None))
+            else:
+                self.removable_templates.append((None, removable_template.lower()))
+
+    def reset(self):
+        """Forget the state of any previous document, keeping the configuration."""
+        super().reset()
+        self.removable_transclusion_fragments = set()
 
     def get_child_context(self, tag):
         """Get the context for a new tag being opened."""
         context = self.get_context()
-        tag_type = tag.get("attributes", {}).get("typeof", "") or tag.get("attributes", {}).get("rel", "")
+        attributes = tag.get("attributes", EMPTY_ATTRIBUTES)
+        tag_type = attributes.get("typeof", "") or attributes.get("rel", "")
 
         if context == "removable" or self.is_removable(tag):
             return "removable"
 
-        # Any descendent of Transclusion/Placeholder is verbatim
-        if context == "verbatim" or re.search(r"(^|\s)(mw:Transclusion|mw:Placeholder)\b", tag_type):
+        # Any descendent of Transclusion/Placeholder is verbatim. Most typeof/rel
+        # values are links, so rule them out with substring tests before the regex
+        # confirms the token boundary (mw:Placeholder/StrippedTag still counts)
+        if context == "verbatim" or (
+            ("mw:Transclusion" in tag_type or "mw:Placeholder" in tag_type) and TRANSCLUSION_TYPE_RE.search(tag_type)
+        ):
             return "verbatim"
 
         # Otherwise, figure is media
         if tag["name"] == "figure":
             return "media"
 
-        if tag["name"] == "span" and re.search(r"(^|\s)(mw:File|mw:Image|mw:Video|mw:Audio)\b", tag_type):
+        if tag["name"] == "span" and tag_type and MEDIA_TYPE_RE.search(tag_type):
             return "media-inline"
 
-        # Immediate children of body are sections
-        if context is None and tag["name"] == "body":
-            return "section"
-
-        # And figure//figcaption is contentBranch
-        if (context in ("media", "media-inline")) and tag["name"] == "figcaption":
-            return "contentBranch"
-
-        # And ContentBranchNodes are contentBranch
-        if (context in ("section", None)) and tag["name"] in CONTENT_BRANCH_NODE_NAMES:
-            return "contentBranch"
-
-        # Else same as parent context
-        return context
+        # The remaining rules depend only on the parent context and tag name;
+        # else same as parent context
+        return CHILD_CONTEXTS.get(context, NO_TRANSITIONS).get(tag["name"], context)
 
     def can_segment(self):
         """Determine whether sentences can be segmented."""
@@ -93,59 +127,70 @@ class mw_contextualizer(Contextualizer):
         Returns:
             Whether the tag is removable
         """
-        removable_sections = self.config.get("removableSections")
-        if not removable_sections:
+        if not self.has_removable_sections:
             return False
 
-        about = tag.get("attributes", {}).get("about")
+        attributes = tag.get("attributes", EMPTY_ATTRIBUTES)
+        about = attributes.get("about")
         if about in self.removable_transclusion_fragments:
             # Once a transclusion is removed, make sure their fragments also removed
             return True
 
         # Check classes
-        class_list = tag.get("attributes", {}).get("class", "").split()
-        for removable_class in removable_sections.get("classes", []):
-            if removable_class in class_list:
-                if about:
-                    self.removable_transclusion_fragments.append(about)
-                return True
+        if self.removable_classes:
+            class_list = attributes.get("class", "").split()
+            for removable_class in self.removable_classes:
+                if removable_class in class_list:
+                    if about:
+                        self.removable_transclusion_fragments.add(about)
+                    return True
 
         # Check RDFa
-        types = tag.get("attributes", {}).get("typeof", "").split()
-        rels = tag.get("attributes", {}).get("rel", "").split()
-        rdfa = types + rels
-        for removable_rdfa in removable_sections.get("rdfa", []):
-            # Make sure that the rdfa value matches
-            if removable_rdfa in rdfa and len(rdfa) == 1:
-                if about:
-                    self.removable_transclusion_fragments.append(about)
-                return True
+        if self.removable_rdfa:
+            types = attributes.get("typeof", "").split()
+            rels = attributes.get("rel", "").split()
+            rdfa = types + rels
+            for removable_rdfa in self.removable_rdfa:
+                # Make sure that the rdfa value matches
+                if removable_rdfa in rdfa and len(rdfa) == 1:
+                    if about:
+                        self.removable_transclusion_fragments.add(about)
+                    return True
+
+        # Check templates; without any configured there is no reason to parse data-mw
+        if not self.removable_templates:
+            return False
 
-        # Check templates
-        data_mw = tag.get("attributes", {}).get("data-mw")
+        data_mw = attributes.get("data-mw")
         if not data_mw:
             return False
 
-        try:
-            mw_data = json.loads(data_mw)
-        except (json.JSONDecodeError, ValueError):
+        # The parser and the contextualizer both ask about each open tag, so keep
+        # the parsed data-mw on the tag (None when it is not valid JSON)
+        mw_data = tag.get("parsedDataMw", _UNPARSED)
+        if mw_data is _UNPARSED:
+            try:
+                mw_data = orjson.loads(data_mw)
+            except orjson.JSONDecodeError:
+                mw_data = None
+            tag["parsedDataMw"] = mw_data
+        if mw_data is None:
             return False
 
         template_name = cxutil.get_prop(["parts", 0, "template", "target", "wt"], mw_data)
         if not template_name:
             return False
 
-        for removable_template in removable_sections.get("templates", []):
-            if removable_template.startswith("/") and removable_template.endswith("/"):
-                # A regular expression is given
-                removable_template_regexp = re.compile(removable_template[1:-1], re.IGNORECASE)
+        template_name_lower = template_name.lower()
+        for removable_template_regexp, removable_template_name in self.removable_templates:
+            if removable_template_regexp is not None:
                 match = removable_template_regexp.search(template_name)
             else:
-                match = template_name.lower() == removable_template.lower()
+                match = template_name_lower == removable_template_name
 
             if match:
                 if about:
-                    self.removable_transclusion_fragments.append(about)
+                    self.removable_transclusion_fragments.add(about)
                 return True
 
         return False
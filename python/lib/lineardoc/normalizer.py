@@ -2,15 +2,9 @@
 Normalizer - Parser to normalize XML.
 """
 
-from lxml import etree
-
 from . import utils
-from .parser import VOID_ELEMENTS
-
-
-def esc(s):
-    """Escape text for inclusion in HTML."""
-    return s.replace("&", "&#38;").replace("<", "&#60;").replace(">", "&#62;")
+from .parser import VOID_ELEMENTS, ParseError, iter_sax_events, lower_tag_name
+from .utils import esc
 
 
 class Normalizer:
@@ -32,42 +26,34 @@ class Normalizer:
         Args:
             html: HTML string to normalize
         """
-        parser = etree.HTMLParser()
         try:
-            tree = etree.fromstring(html, parser)
-            self._process_element(tree)
-        except Exception:
-            # Try with wrapping
-            try:
-                tree = etree.fromstring(f"<div>{html}</div>", parser)
-                for child in tree:
-                    self._process_element(child)
-            except Exception as e:
-                raise Exception(f"Failed to parse HTML: {e}")
-
-    def _process_element(self, element):
-        """Process an element recursively."""
-        tag_name = element.tag.lower() if self.lowercase else element.tag  # Create tag dict
-        tag = {"name": tag_name, "attributes": dict(element.attrib)}
-
-        # Mark HTML void elements as self-closing
-        if tag_name in VOID_ELEMENTS:
-            tag["isSelfClosing"] = True
-
-        self.on_open_tag(tag)
-
-        # Process text content
-        if element.text:
-            self.on_text(element.text)
-
-        # Process children
-        for child in element:
-            self._process_element(child)
-            # Process tail text after child
-            if child.tail:
-                self.on_text(child.tail)
-
-        self.on_close_tag(tag_name)
+            self._process_events(iter_sax_events(html))
+        except Exception as e:
+            raise ParseError(f"Failed to parse HTML: {e}") from e
+
+    def _process_events(self, events):
+        """Dispatch a stream of SAX events to the open/text/close handlers."""
+        # Runs once per node: resolve the handlers and options once, not per event
+        on_open_tag = self.on_open_tag
+        on_close_tag = self.on_close_tag
+        on_text = self.on_text
+        lowercase = self.lowercase
+        for event, value in events:
+            if event == "text":
+                on_text(value)
+            elif event == "open":
+                tag_name = lower_tag_name(value.tag) if lowercase else value.tag  # Create tag dict
+                # Attributes are only read, and only while serializing this open
+                # tag, so the element's live mapping can be used without a copy
+                tag = {"name": tag_name, "attributes": value.attrib}
+
+                # Mark HTML void elements as self-closing
+                if tag_name in VOID_ELEMENTS:
+                    tag["isSelfClosing"] = True
+
+                on_open_tag(tag)
+            else:
+                on_close_tag(lower_tag_name(value.tag) if lowercase else value.tag)
 
     def on_open_tag(self, tag):
         """Handle open tag event."""
@@ -2,115 +2,256 @@
 Parser to read an HTML stream into a Doc.
 """
 
+import sys
+import threading
+
 from lxml import etree
 
 from . import utils
 from .builder import Builder
 
-BLOCK_TAGS = [
-    "html",
-    "head",
-    "body",
-    "script",
-    # head tags
-    # In HTML5+RDFa, link/meta are actually allowed anywhere in the body, and are to be
-    # treated as void flow content (like <br> and <img>).
-    "title",
-    "style",
-    "meta",
-    "link",
-    "noscript",
-    "base",
-    # non-visual content
-    "audio",
-    "data",
-    "datagrid",
-    "datalist",
-    "dialog",
-    "eventsource",
-    "form",
-    "iframe",
-    "main",
-    "menu",
-    "menuitem",
-    "optgroup",
-    "option",
-    # paragraph
-    "div",
-    "p",
-    # tables
-    "table",
-    "tbody",
-    "thead",
-    "tfoot",
-    "caption",
-    "th",
-    "tr",
-    "td",
-    # lists
-    "ul",
-    "ol",
-    "li",
-    "dl",
-    "dt",
-    "dd",
-    # HTML5 heading content
-    "h1",
-    "h2",
-    "h3",
-    "h4",
-    "h5",
-    "h6",
-    "hgroup",
-    # HTML5 sectioning content
-    "article",
-    "aside",
-    "body",
-    "nav",
-    "section",
-    "footer",
-    "header",
-    "figure",
-    "figcaption",
-    "fieldset",
-    "details",
-    "blockquote",
-    "address",  # added by Giovanni Toffoli
-    # other
-    "hr",
-    "button",
-    "canvas",
-    "center",
-    "col",
-    "colgroup",
-    "embed",
-    "map",
-    "object",
-    "pre",
-    "progress",
-    "video",
-    # non-annotation inline tags
-    "img",
-    "br",
-]
+# Parsed tag names are interned, so membership tests against these literals mostly compare by identity
+BLOCK_TAGS = frozenset(
+    [
+        "html",
+        "head",
+        "body",
+        "script",
+        # head tags
+        # In HTML5+RDFa, link/meta are actually allowed anywhere in the body, and are to be
+        # treated as void flow content (like <br> and <img>).
+        "title",
+        "style",
+        "meta",
+        "link",
+        "noscript",
+        "base",
+        # non-visual content
+        "audio",
+        "data",
+        "datagrid",
+        "datalist",
+        "dialog",
+        "eventsource",
+        "form",
+        "iframe",
+        "main",
+        "menu",
+        "menuitem",
+        "optgroup",
+        "option",
+        # paragraph
+        "div",
+        "p",
+        # tables
+        "table",
+        "tbody",
+        "thead",
+        "tfoot",
+        "caption",
+        "th",
+        "tr",
+        "td",
+        # lists
+        "ul",
+        "ol",
+        "li",
+        "dl",
+        "dt",
+        "dd",
+        # HTML5 heading content
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "hgroup",
+        # HTML5 sectioning content
+        "article",
+        "aside",
+        "body",
+        "nav",
+        "section",
+        "footer",
+        "header",
+        "figure",
+        "figcaption",
+        "fieldset",
+        "details",
+        "blockquote",
+        "address",  # added by Giovanni Toffoli
+        # other
+        "hr",
+        "button",
+        "canvas",
+        "center",
+        "col",
+        "colgroup",
+        "embed",
+        "map",
+        "object",
+        "pre",
+        "progress",
+        "video",
+        # non-annotation inline tags
+        "img",
+        "br",
+    ]
+)
 
 # HTML void elements that cannot have content and should be self-closing
-VOID_ELEMENTS = [
-    "area",
-    "base",
-    "br",
-    "col",
-    "embed",
-    "hr",
-    "img",
-    "input",
-    "link",
-    "meta",
-    "param",
-    "source",
-    "track",
-    "wbr",
-]
+VOID_ELEMENTS = frozenset(
+    [
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    ]
+)
+
+# Lowercased, interned tag names by name as parsed. Documents draw on a small set of
+# tag names, so after the first few nodes every lookup hits; the cap bounds the cache
+# for documents full of made-up element names
+_lower_tag_names = {}
+MAX_CACHED_TAG_NAMES = 1024
+
+
+def lower_tag_name(name):
+    """
+    Lowercase and intern a parsed tag name, reusing earlier results.
+
+    Args:
+        name: Tag name as reported by the parser
+
+    Returns:
+        The interned lowercase tag name
+    """
+    lowered = _lower_tag_names.get(name)
+    if lowered is None:
+        lowered = sys.intern(name.lower())
+        if len(_lower_tag_names) < MAX_CACHED_TAG_NAMES:
+            _lower_tag_names[name] = lowered
+    return lowered
+
+
+class ParseError(Exception):
+    """Raised when an HTML document cannot be read into a linear document."""
+
+
+# Size of the chunks fed to the pull parser in iter_sax_events
+FEED_CHUNK_SIZE = 64 * 1024
+
+# Idle pull parsers, per thread, for reuse across iter_sax_events calls
+_thread_local = threading.local()
+
+
+def _acquire_pull_parser():
+    """Take an idle pull parser of the current thread, or create one."""
+    idle_parsers = getattr(_thread_local, "idle_parsers", None)
+    if idle_parsers is None:
+        _thread_local.idle_parsers = []
+    elif idle_parsers:
+        return idle_parsers.pop()
+    # Events are handled iteratively, so nesting depth costs nothing on the Python
+    # side. huge_tree lifts libxml2's default depth limit of 256, past which it
+    # silently drops deeper elements (nested tables and lists reach it)
+    return etree.HTMLPullParser(events=("start", "end", "comment", "pi"), huge_tree=True)
+
+
+def _release_pull_parser(pull_parser, closed):
+    """Reset a pull parser and return it to the current thread's idle list."""
+    if not closed:
+        # Abandoned mid-document, e.g. a handler raised; finish it to reset the parser
+        try:
+            pull_parser.close()
+        except etree.LxmlError:
+            pass
+    # Drop unread events so they do not leak into the next document
+    for _ in pull_parser.read_events():
+        pass
+    # An abandoned generator may be finalized from another thread
+    idle_parsers = getattr(_thread_local, "idle_parsers", None)
+    if idle_parsers is not None:
+        idle_parsers.append(pull_parser)
+
+
+def iter_sax_events(data):
+    """
+    Stream SAX-style events for an HTML document.
+
+    The pull parser is fed in chunks and finished elements are cleared as we go,
+    so only the currently open branch of the tree is kept in memory.
+
+    An element's text (or tail) is only complete once the parser has moved on to
+    the next node, so it is emitted when the following event arrives.
+
+    Args:
+        data: HTML string or bytes to parse
+
+    Yields:
+        ("open", element), ("text", text) and ("close", element) tuples in document order
+    """
+    pull_parser = _acquire_pull_parser()
+    closed = False
+    # Element whose text (on start) or tail (on end) is still pending
+    pending = None
+    pending_is_start = False
+
+    def read_events():
+        nonlocal closed
+        # Feed at least once: closing a parser that was never fed fails on empty input
+        for start in range(0, max(len(data), 1), FEED_CHUNK_SIZE):
+            pull_parser.feed(data[start : start + FEED_CHUNK_SIZE])
+            yield from pull_parser.read_events()
+        pull_parser.close()
+        closed = True
+        yield from pull_parser.read_events()
+
+    try:
+        for action, element in read_events():
+            if pending is not None:
+                if pending_is_start:
+                    if pending.text:
+                        yield "text", pending.text
+                else:
+                    parent = pending.getparent()
+                    if parent is not None:
+                        if pending.tail:
+                            yield "text", pending.tail
+                        # Free the finished element and its already processed siblings
+                        pending.clear(keep_tail=False)
+                        while pending.getprevious() is not None:
+                            del parent[0]
+
+            if action == "start":
+                yield "open", element
+                pending, pending_is_start = element, True
+            elif action == "end":
+                yield "close", element
+                if element.getparent() is None:
+                    # The pull parser reports anything after the root closes as further
+                    # root elements; like a parsed tree, keep only the first root
+                    return
+                pending, pending_is_start = element, False
+            else:
+                # Comments and processing instructions are skipped, but not their tails
+                pending, pending_is_start = element, False
+
+        if pending is not None and not pending_is_start and pending.getparent() is not None and pending.tail:
+            yield "text", pending.tail
+    finally:
+        _release_pull_parser(pull_parser, closed)
 
 
 class Parser:
@@ -129,11 +270,16 @@ class Parser:
         self.lowercase = True
 
     def init(self):
-        """Initialize parser state."""
+        """Initialize parser state; also resets a parser reused for another document."""
+        self.contextualizer.reset()
         self.root_builder = Builder()
         self.builder = self.root_builder
         # Stack of tags currently open
         self.all_tags = []
+        # Whether each open tag was classified as an inline annotation when it opened
+        self.all_tags_is_ann = []
+        # Nesting depth inside a removable subtree; 0 when outside one
+        self.removable_depth = 0
 
     def write(self, html):
         """
@@ -142,48 +288,47 @@ class Parser:
         Args:
             html: HTML string to parse
         """
-        parser = etree.HTMLParser()
+        # The pull parser recovers from malformed markup and fragments by itself, so any
+        # failure comes from the handlers and would recur on a re-parse
         try:
-            tree = etree.fromstring(html.encode("utf-8"), parser)
-            self._process_element(tree)
-        except Exception:
-            # Try with wrapping
-            try:
-                tree = etree.fromstring(f"<div>{html}</div>".encode("utf-8"), parser)
-                for child in tree:
-                    self._process_element(child)
-            except Exception as e:
-                raise Exception(f"Failed to parse HTML: {e}")
-
-    def _process_element(self, element):
-        """Process an element and its children recursively."""
-        # Skip comments and other special nodes
-        if not isinstance(element.tag, str):
-            return
-
-        tag_name = element.tag.lower() if self.lowercase else element.tag
-
-        # Create tag dict
-        tag = {"name": tag_name, "attributes": dict(element.attrib)}
-
-        # Mark HTML void elements as self-closing
-        if tag_name in VOID_ELEMENTS:
-            tag["isSelfClosing"] = True
-
-        self.on_open_tag(tag)
-
-        # Process text content
-        if element.text:
-            self.on_text(element.text)
-
-        # Process children
-        for child in element:
-            self._process_element(child)
-            # Process tail text after child
-            if child.tail:
-                self.on_text(child.tail)
-
-        self.on_close_tag(tag_name)
+            self._process_events(iter_sax_events(html))
+        except Exception as e:
+            raise ParseError(f"Failed to parse HTML: {e}") from e
+
+    def _process_events(self, events):
+        """Dispatch a stream of SAX events to the open/text/close handlers."""
+        # Runs once per node: resolve the handlers and options once, not per event
+        on_open_tag = self.on_open_tag
+        on_close_tag = self.on_close_tag
+        on_text = self.on_text
+        lowercase = self.lowercase
+        for event, value in events:
+            if event == "text":
+                on_text(value)
+            elif event == "open":
+                if self.removable_depth:
+                    # Inside a removable subtree only the nesting matters
+                    self.removable_depth += 1
+                    continue
+
+                tag_name = lower_tag_name(value.tag) if lowercase else value.tag
+
+                # Create tag dict
+                # The builder keeps and mutates attributes after the element is
+                # cleared, so copy them; items() skips building the _Attrib proxy.
+                # Most elements have no attributes, and {} is cheaper than dict([]).
+                # Rendering caches the open tag on this dict as 'openTagHtml'; whoever
+                # later edits it in place must drop that key (see utils.get_open_tag_html)
+                attributes = value.items()
+                tag = {"name": tag_name, "attributes": dict(attributes) if attributes else {}}
+
+                # Mark HTML void elements as self-closing
+                if tag_name in VOID_ELEMENTS:
+                    tag["isSelfClosing"] = True
+
+                on_open_tag(tag)
+            else:
+                on_close_tag(lower_tag_name(value.tag) if lowercase else value.tag)
 
     def on_open_tag(self, tag):
         """
@@ -192,26 +337,43 @@ class Parser:
         Args:
             tag: Tag dict
         """
-        if self.contextualizer.get_context() == "removable" or self.contextualizer.is_removable(tag):
-            self.all_tags.append(tag)
-            self.contextualizer.on_open_tag(tag)
+        if self.removable_depth:
+            self.removable_depth += 1
             return
 
+        # Read the context stack directly: these checks run for every node
+        contextualizer = self.contextualizer
+        contexts = contextualizer.contexts
+        if (contexts and contexts[-1] == "removable") or contextualizer.is_removable(tag):
+            # Skip the whole subtree: its descendants never reach the builder
+            # or the contextualizer, so only count nesting until it closes
+            self.removable_depth = 1
+            return
+
+        # Classify once, in the parent's context; the close tag reuses the result.
+        # Only a style tag's classification depends on it being a transclusion,
+        # so skip the typeof regex for everything else
+        tag_name = tag["name"]
+        is_ann = self.is_inline_annotation_tag(tag_name, tag_name == "style" and utils.is_transclusion(tag))
+
+        builder = self.builder
         if self.options.get("isolateSegments") and utils.is_segment(tag):
-            self.builder.push_block_tag({"name": "div", "attributes": {"class": "cx-segment-block"}})
+            builder.push_block_tag({"name": "div", "attributes": {"class": "cx-segment-block"}})
 
-        if utils.is_reference(tag) or utils.is_math(tag):
+        # References and maths are only ever span or sup; test the name before calling out
+        if (tag_name == "span" or tag_name == "sup") and (utils.is_reference(tag) or utils.is_math(tag)):
             # Start a reference: create a child builder, and move into it
-            self.builder = self.builder.create_child_builder(tag)
-        elif utils.is_inline_empty_tag(tag["name"]):
-            self.builder.add_inline_content(tag, self.contextualizer.can_segment())
-        elif self.is_inline_annotation_tag(tag["name"], utils.is_transclusion(tag)):
-            self.builder.push_inline_annotation_tag(tag)
+            self.builder = builder.create_child_builder(tag)
+        elif utils.is_inline_empty_tag(tag_name):
+            builder.add_inline_content(tag, contextualizer.can_segment())
+        elif is_ann:
+            builder.push_inline_annotation_tag(tag)
         else:
-            self.builder.push_block_tag(tag)
+            builder.push_block_tag(tag)
 
         self.all_tags.append(tag)
-        self.contextualizer.on_open_tag(tag)
+        self.all_tags_is_ann.append(is_ann)
+        contextualizer.on_open_tag(tag)
 
     def on_close_tag(self, tag_name):
         """
@@ -220,38 +382,40 @@ class Parser:
         Args:
             tag_name: Name of tag to close
         """
+        if self.removable_depth:
+            self.removable_depth -= 1
+            return
+
         if not self.all_tags:
             return
 
         tag = self.all_tags.pop()
-        is_ann = self.is_inline_annotation_tag(tag_name, utils.is_transclusion(tag))
+        is_ann = self.all_tags_is_ann.pop()
 
-        if self.contextualizer.is_removable(tag) or self.contextualizer.get_context() == "removable":
-            self.contextualizer.on_close_tag(tag)
-            return
-
-        self.contextualizer.on_close_tag(tag)
+        contextualizer = self.contextualizer
+        contextualizer.on_close_tag(tag)
 
+        builder = self.builder
         if utils.is_inline_empty_tag(tag_name):
             return
-        elif is_ann and len(self.builder.inline_annotation_tags) > 0:
-            self.builder.pop_inline_annotation_tag(tag_name)
+        elif is_ann and builder.inline_annotation_tags:
+            builder.pop_inline_annotation_tag(tag_name)
             if self.options.get("isolateSegments") and utils.is_segment(tag):
-                self.builder.pop_block_tag("div")
-        elif is_ann and self.builder.parent is not None:
+                builder.pop_block_tag("div")
+        elif is_ann and builder.parent is not None:
             # In a sub document: should be a span or sup that closes a reference
             if tag_name not in ("span", "sup"):
                 raise Exception(f'Expected close reference - span or sup tags, got "{tag_name}"')
-            self.builder.finish_text_block()
-            self.builder.parent.add_inline_content(self.builder.doc, self.contextualizer.can_segment())
+            builder.finish_text_block()
+            builder.parent.add_inline_content(builder.doc, contextualizer.can_segment())
             # Finished with child now. Move back to the parent builder
-            self.builder = self.builder.parent
+            self.builder = builder.parent
         elif not is_ann:
             # Block level tag close
-            if tag_name == "p" and self.contextualizer.can_segment():
-                # Add an empty textchunk before the closing block tag
-                self.builder.add_text_chunk("", self.contextualizer.can_segment())
-            self.builder.pop_block_tag(tag_name)
+            if tag_name == "p" and contextualizer.can_segment():
+                # Add an empty textchunk before the closing block tag; it can be segmented
+                builder.add_text_chunk("", True)
+            builder.pop_block_tag(tag_name)
         else:
             raise Exception(f"Unexpected close tag: {tag_name}")
 
@@ -262,7 +426,7 @@ class Parser:
         Args:
             text: Text content
         """
-        if self.contextualizer.get_context() == "removable":
+        if self.removable_depth:
             return
         self.builder.add_text_chunk(text, self.contextualizer.can_segment())
 
@@ -281,19 +445,18 @@ class Parser:
         Returns:
             Whether the tag is an inline annotation
         """
-        context = self.contextualizer.get_context()
-
-        # <span> inside a media context acts like a block tag
-        if tag_name == "span" and context == "media":
-            return False
+        # All tags that are not block tags are inline annotation tags, with one exception
+        if tag_name not in BLOCK_TAGS:
+            if tag_name != "span":
+                return True
+            # <span> inside a media context acts like a block tag
+            contexts = self.contextualizer.contexts
+            return not contexts or contexts[-1] != "media"
 
         # Audio or Video are block tags. But in a media-inline context they are inline
-        if tag_name in ("audio", "video") and context == "media-inline":
-            return True
+        if tag_name in ("audio", "video"):
+            contexts = self.contextualizer.contexts
+            return bool(contexts) and contexts[-1] == "media-inline"
 
         # Styles are usually block tags, but sometimes style tags are used as transclusions
-        if tag_name == "style" and is_transclusion:
-            return True
-
-        # All tags that are not block tags are inline annotation tags
-        return tag_name not in BLOCK_TAGS
+        return tag_name == "style" and bool(is_transclusion)
@@ -2,7 +2,7 @@
 text_block - A block of annotated inline text.
 """
 
-import re
+import bisect
 
 from . import utils
 from .text_chunk import text_chunk
@@ -21,13 +21,30 @@ class text_block:
         """
         self.text_chunks = text_chunks
         self.can_segment = can_segment
-        self.offsets = []
+        # Start offset of each chunk, in order. Lengths and tags live on the chunks themselves
+        self.chunk_starts = []
 
         cursor = 0
         for t_chunk in self.text_chunks:
-            self.offsets.append({"start": cursor, "length": len(t_chunk.text), "tags": t_chunk.tags})
+            self.chunk_starts.append(cursor)
             cursor += len(t_chunk.text)
 
+        # Filled in by get_plain_text; chunks are not changed after construction
+        self._plain_text = None
+
+    @property
+    def offsets(self):
+        """
+        Get the start, length and tags of each text chunk.
+
+        Returns:
+            Array of offset dicts, built on demand
+        """
+        return [
+            {"start": start, "length": len(t_chunk.text), "tags": t_chunk.tags}
+            for start, t_chunk in zip(self.chunk_starts, self.text_chunks, strict=True)
+        ]
+
     def get_tag_offsets(self):
         """
         Get the start and length of each non-common annotation.
@@ -35,13 +52,12 @@ class text_block:
         Returns:
             Array of offset dicts
         """
-        common_tags = self.get_common_tags()
-        result = []
-        for i, offset in enumerate(self.offsets):
-            t_chunk = self.text_chunks[i]
-            if len(t_chunk.tags) > len(common_tags) and len(t_chunk.text) > 0:
-                result.append(offset)
-        return result
+        common_tag_length = len(self.get_common_tags())
+        return [
+            {"start": start, "length": len(t_chunk.text), "tags": t_chunk.tags}
+            for start, t_chunk in zip(self.chunk_starts, self.text_chunks, strict=True)
+            if len(t_chunk.tags) > common_tag_length and len(t_chunk.text) > 0
+        ]
 
     def get_text_chunk_at(self, char_offset):
         """
@@ -53,10 +69,8 @@ class text_block:
         Returns:
             The text chunk
         """
-        i = 0
-        for i in range(len(self.text_chunks) - 1):
-            if self.offsets[i + 1]["start"] > char_offset:
-                break
+        # The first chunk is returned for any offset before the second chunk starts
+        i = bisect.bisect_right(self.chunk_starts, char_offset, 1) - 1
         return self.text_chunks[i]
 
     def get_common_tags(self):
@@ -69,18 +83,20 @@ class text_block:
         if len(self.text_chunks) == 0:
             return []
 
-        common_tags = self.text_chunks[0].tags[:]
-        for t_chunk in self.text_chunks:
+        first_tags = self.text_chunks[0].tags
+        common_length = len(first_tags)
+        for t_chunk in self.text_chunks[1:]:
             tags = t_chunk.tags
-            if len(tags) < len(common_tags):
-                common_tags = common_tags[: len(tags)]
-
-            for j in range(len(common_tags)):
-                if common_tags[j]["name"] != tags[j]["name"]:
-                    common_tags = common_tags[:j]
-                    break
+            max_length = min(common_length, len(tags))
+            j = 0
+            # Tag dicts are usually shared between chunks, so the identity check settles most comparisons
+            while j < max_length and (first_tags[j] is tags[j] or first_tags[j]["name"] == tags[j]["name"]):
+                j += 1
+            common_length = j
+            if common_length == 0:
+                return []
 
-        return common_tags
+        return first_tags[:common_length]
 
     def translate_tags(self, target_text, range_mappings):
         """
@@ -96,16 +112,15 @@ class text_block:
         # map of { offset: x, text_chunks: [...] }
         empty_text_chunks = {}
         empty_text_chunk_offsets = []
-        # list of { start: x, length: x, t_chunk: x }
+        # list of { start: x, length: x, text_chunk: x }
         text_chunks = []
 
         def push_empty_text_chunks(offset, chunks):
             for chunk in chunks:
-                text_chunks.append({"start": offset, "length": 0, "t_chunk": chunk})
+                text_chunks.append({"start": offset, "length": 0, "text_chunk": chunk})
 
         # Create map of empty text chunks, by offset
-        for i, t_chunk in enumerate(self.text_chunks):
-            offset = self.offsets[i]["start"]
+        for offset, t_chunk in zip(self.chunk_starts, self.text_chunks, strict=True):
             if len(t_chunk.text) > 0:
                 continue
             if offset not in empty_text_chunks:
@@ -128,19 +143,15 @@ class text_block:
                 }
             )
 
-            # Empty source text chunks will not be represented in the target plaintext
-            j = 0
-            while j < len(empty_text_chunk_offsets):
-                offset = empty_text_chunk_offsets[j]
-                # Check whether chunk is in range
-                if offset < range_mapping["source"]["start"] or offset > source_range_end:
-                    j += 1
-                    continue
+            # Empty source text chunks will not be represented in the target plaintext.
+            # The remaining offsets are sorted, so the ones in range form a contiguous run
+            lo = bisect.bisect_left(empty_text_chunk_offsets, range_mapping["source"]["start"])
+            hi = bisect.bisect_right(empty_text_chunk_offsets, source_range_end, lo)
+            for offset in empty_text_chunk_offsets[lo:hi]:
                 # Push chunk into target text at the current point
-                push_empty_text_chunks(target_range_end, empty_text_chunks[offset])
-                # Remove chunk from remaining list
-                del empty_text_chunks[offset]
-                empty_text_chunk_offsets.pop(j)
+                push_empty_text_chunks(target_range_end, empty_text_chunks.pop(offset))
+            # Remove chunks from remaining list
+            del empty_text_chunk_offsets[lo:hi]
 
         # Sort by start position
         text_chunks.sort(key=lambda x: x["start"])
@@ -169,12 +180,10 @@ class text_block:
 
         # Get trailing text and trailing whitespace
         tail = target_text[pos:]
-        import re
-
-        tail_space_match = re.search(r"\s*$", tail)
-        tail_space = tail_space_match.group(0) if tail_space_match else ""
-        if tail_space:
-            tail = tail[: -len(tail_space)]
+        # rstrip strips the same characters as the regex \s class
+        stripped_tail = tail.rstrip()
+        tail_space = tail[len(stripped_tail) :]
+        tail = stripped_tail
 
         if tail:
             # Append tail as text with common_tags
@@ -200,7 +209,9 @@ class text_block:
         Returns:
             Plain text representation
         """
-        return "".join(chunk.text for chunk in self.text_chunks)
+        if self._plain_text is None:
+            self._plain_text = "".join([chunk.text for chunk in self.text_chunks])
+        return self._plain_text
 
     def get_html(self):
         """
@@ -210,44 +221,49 @@ class text_block:
             HTML representation
         """
         html = []
+        self.write_html(html)
+        return "".join(html)
+
+    def write_html(self, html):
+        """
+        Append the HTML representation of the text block to a list of strings.
+
+        Args:
+            html: List that the HTML fragments are appended to
+        """
         # Start with no tags open
         old_tags = []
 
         for t_chunk in self.text_chunks:
-            # Compare tag stacks; render close tags and open tags as necessary
-            # Find the highest offset up to which the tags match
-            match_top = -1
-            min_length = min(len(old_tags), len(t_chunk.tags))
-            for j in range(min_length):
-                if old_tags[j] is t_chunk.tags[j]:
-                    match_top = j
-                else:
-                    break
-
-            for j in range(len(old_tags) - 1, match_top, -1):
-                html.append(utils.get_close_tag_html(old_tags[j]))
+            tags = t_chunk.tags
+            # Split chunks share their tag list, in which case nothing opens or closes
+            if tags is not old_tags:
+                # Compare tag stacks; render close tags and open tags as necessary
+                # Find the length up to which the tags match
+                match_length = 0
+                for old_tag, tag in zip(old_tags, tags, strict=False):
+                    if old_tag is not tag:
+                        break
+                    match_length += 1
 
-            for j in range(match_top + 1, len(t_chunk.tags)):
-                html.append(utils.get_open_tag_html(t_chunk.tags[j]))
+                html.extend(map(utils.get_close_tag_html, reversed(old_tags[match_length:])))
+                html.extend(map(utils.get_open_tag_html, tags[match_length:]))
 
-            old_tags = t_chunk.tags
+                old_tags = tags
 
             # Now add text and inline content
             html.append(utils.esc(t_chunk.text))
             if t_chunk.inline_content:
-                if hasattr(t_chunk.inline_content, "get_html"):
-                    # a sub-doc
-                    html.append(t_chunk.inline_content.get_html())
+                if hasattr(t_chunk.inline_content, "write_html"):
+                    # a sub-doc: write straight into the same list
+                    t_chunk.inline_content.write_html(html)
                 else:
                     # an empty inline tag
                     html.append(utils.get_open_tag_html(t_chunk.inline_content))
                     html.append(utils.get_close_tag_html(t_chunk.inline_content))
 
         # Finally, close any remaining tags
-        for j in range(len(old_tags) - 1, -1, -1):
-            html.append(utils.get_close_tag_html(old_tags[j]))
-
-        return "".join(html)
+        html.extend(map(utils.get_close_tag_html, reversed(old_tags)))
 
     def get_root_item(self):
         """
@@ -257,7 +273,7 @@ class text_block:
             Root item or None
         """
         for t_chunk in self.text_chunks:
-            if len(t_chunk.tags) == 0 and t_chunk.text and re.search(r"[^\s]", t_chunk.text):
+            if not t_chunk.tags and t_chunk.text and not t_chunk.text.isspace():
                 # No tags in this textchunk. See if there is non whitespace text
                 return None
 
@@ -332,12 +348,13 @@ class text_block:
                 if rel_offset == 0:
                     flush_chunks()
                 else:
-                    left_part = text_chunk(t_chunk.text[:rel_offset], t_chunk.tags[:])
-                    right_part = text_chunk(t_chunk.text[rel_offset:], t_chunk.tags[:], t_chunk.inline_content)
+                    # Tag lists are never mutated once a chunk is built, so both parts share them
+                    left_part = text_chunk(t_chunk.text[:rel_offset], t_chunk.tags)
+                    right_part = text_chunk(t_chunk.text[rel_offset:], t_chunk.tags, t_chunk.inline_content)
                     current_text_chunks.append(left_part)
                     offset += rel_offset
                     flush_chunks()
-                    text_ct_chunkhunk = right_part
+                    t_chunk = right_part
 
             # Even if the t_chunk is zero-width, it may have references
             current_text_chunks.append(t_chunk)
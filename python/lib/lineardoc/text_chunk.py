@@ -14,6 +14,8 @@ therefore text with varying markup must be split into multiple chunks.
 class text_chunk:
     """A chunk of uniformly-annotated inline text."""
 
+    __slots__ = ("text", "tags", "inline_content")
+
     def __init__(self, text, tags, inline_content=None):
         """
         Initialize a text_chunk.
@@ -3,10 +3,18 @@ Utility functions for HTML processing and tag manipulation.
 """
 
 import re
+from bisect import bisect_right
+from types import MappingProxyType
 
-from . import util as cxutil
 from .text_chunk import text_chunk
 
+NON_TRANSLATABLE_TAGS = frozenset(["style", "svg", "script"])
+NON_TRANSLATABLE_RDFA = frozenset(["mw:Entity", "mw:Extension/math", "mw:Extension/references", "mw:Transclusion"])
+INLINE_EMPTY_TAGS = frozenset(["br", "img", "source", "track", "link", "meta"])
+# Read-only default for attribute lookups on tags that may lack "attributes"
+EMPTY_ATTRIBUTES = MappingProxyType({})
+TRANSCLUSION_RE = re.compile(r"(?:^|\s)(?:mw:Transclusion|mw:Placeholder)\b")
+
 
 def find_all(text, regex, callback):
     """
@@ -38,6 +46,8 @@ def esc(s):
     Returns:
         Escaped version of the string
     """
+    # str.replace returns the string itself when there is nothing to replace, so the
+    # common case is three memchr scans and no allocation; this beats str.translate
     return s.replace("&", "&#38;").replace("<", "&#60;").replace(">", "&#62;")
 
 
@@ -54,27 +64,48 @@ def esc_attr(s) -> str:
     s = str(s)
     # Replace ", ', &, <, > with their HTML numeric entities
     # return "".join(html_escape_table.get(c, c) for c in s)
-    return re.sub(r'["\'&<>]', lambda m: f"&#{ord(m.group(0))};", s)
+    # Same reasoning as esc: for typical attribute values the chained replaces
+    # beat both str.translate and a regex callback
+    return (
+        s.replace("&", "&#38;").replace('"', "&#34;").replace("'", "&#39;").replace("<", "&#60;").replace(">", "&#62;")
+    )
 
 
 def get_open_tag_html(tag):
     """
     Render a SAX open tag into an HTML string.
 
+    The result is cached on the tag as 'openTagHtml'. Tag dicts are shared
+    between text chunks and between the parsed, wrapped and segmented Docs,
+    so the cache is reused across all of them. The rule that keeps it
+    correct: code that changes a tag's name, attributes or isSelfClosing in
+    place after the tag may have been rendered must drop 'openTagHtml' in
+    the same step (see set_link_ids_in_place and Builder.push_block_tag).
+    Tags copied with clone_open_tag start without the key.
+
     Args:
         tag: Tag dict with 'name' and 'attributes'
 
     Returns:
         HTML representation of open tag
     """
-    html = ["<" + esc(tag["name"])]
-    attributes = sorted(tag.get("attributes", {}).keys())
-    for attr in attributes:
-        html.append(" " + esc(attr) + '="' + esc_attr(tag["attributes"][attr]) + '"')
-    if tag.get("isSelfClosing"):
-        html.append(" /")
-    html.append(">")
-    return "".join(html)
+    tag_html = tag.get("openTagHtml")
+    if tag_html is None:
+        name = esc(tag["name"])
+        attributes = tag.get("attributes")
+        if not attributes:
+            # Most tags have no attributes: skip the sort and the join
+            tag_html = f"<{name} />" if tag.get("isSelfClosing") else f"<{name}>"
+        else:
+            html = ["<" + name]
+            for attr in sorted(attributes) if len(attributes) > 1 else attributes:
+                html.append(" " + esc(attr) + '="' + esc_attr(attributes[attr]) + '"')
+            if tag.get("isSelfClosing"):
+                html.append(" /")
+            html.append(">")
+            tag_html = "".join(html)
+        tag["openTagHtml"] = tag_html
+    return tag_html
 
 
 def get_close_tag_html(tag):
@@ -103,7 +134,7 @@ def clone_open_tag(tag):
         Cloned tag
     """
     new_tag = {"name": tag["name"], "attributes": {}}
-    for attr, value in tag.get("attributes", {}).items():
+    for attr, value in tag.get("attributes", EMPTY_ATTRIBUTES).items():
         new_tag["attributes"][attr] = value
     return new_tag
 
@@ -124,7 +155,7 @@ def dump_tags(tag_array):
     tag_dumps = []
     for tag in tag_array:
         attr_dumps = []
-        for attr, value in tag.get("attributes", {}).items():
+        for attr, value in tag.get("attributes", EMPTY_ATTRIBUTES).items():
             attr_dumps.append(f"{attr}={esc_attr(value)}")
         tag_name = tag["name"]
         if attr_dumps:
@@ -145,13 +176,13 @@ def is_reference(tag):
     Returns:
         Whether the tag is a mediawiki reference span
     """
-    if (tag["name"] == "span" or tag["name"] == "sup") and tag.get("attributes", {}).get(
-        "typeof"
-    ) == "mw:Extension/ref":
-        return True
-    elif tag["name"] == "sup" and tag.get("attributes", {}).get("class") == "reference":
+    tag_name = tag["name"]
+    if tag_name != "span" and tag_name != "sup":
+        return False
+    attributes = tag.get("attributes", EMPTY_ATTRIBUTES)
+    if attributes.get("typeof") == "mw:Extension/ref":
         return True
-    return False
+    return tag_name == "sup" and attributes.get("class") == "reference"
 
 
 def is_math(tag):
@@ -164,7 +195,8 @@ def is_math(tag):
     Returns:
         Whether the tag is a mediawiki math span
     """
-    return (tag["name"] == "span" or tag["name"] == "sup") and tag.get("attributes", {}).get(
+    tag_name = tag["name"]
+    return (tag_name == "span" or tag_name == "sup") and tag.get("attributes", EMPTY_ATTRIBUTES).get(
         "typeof"
     ) == "mw:Extension/math"
 
@@ -179,15 +211,15 @@ def is_gallery(tag):
     Returns:
         Whether the tag is a mediawiki Gallery
     """
-    return tag["name"] == "ul" and tag.get("attributes", {}).get("typeof") == "mw:Extension/gallery"
+    return tag["name"] == "ul" and tag.get("attributes", EMPTY_ATTRIBUTES).get("typeof") == "mw:Extension/gallery"
 
 
 def is_reference_list(tag):
     """Check if tag is a reference list."""
     return (
         tag["name"] == "div"
-        and tag.get("attributes", {}).get("typeof") == "mw:Extension/references"
-        and tag.get("attributes", {}).get("data-mw")
+        and tag.get("attributes", EMPTY_ATTRIBUTES).get("typeof") == "mw:Extension/references"
+        and tag.get("attributes", EMPTY_ATTRIBUTES).get("data-mw")
     )
 
 
@@ -201,8 +233,9 @@ def is_external_link(tag):
     Returns:
         Whether the tag is an external link or not
     """
-    rel = tag.get("attributes", {}).get("rel", "")
-    return tag["name"] == "a" and f" {rel} ".find(" mw:ExtLink ") != -1
+    if tag["name"] != "a":
+        return False
+    return "mw:ExtLink" in tag.get("attributes", EMPTY_ATTRIBUTES).get("rel", "").split()
 
 
 def is_segment(tag):
@@ -215,18 +248,19 @@ def is_segment(tag):
     Returns:
         Whether the tag is a segment or not
     """
-    return tag["name"] == "span" and tag.get("attributes", {}).get("class") == "cx-segment"
+    return tag["name"] == "span" and tag.get("attributes", EMPTY_ATTRIBUTES).get("class") == "cx-segment"
 
 
 def is_transclusion(tag):
     """Check if tag is a transclusion."""
-    typeof = tag.get("attributes", {}).get("typeof", "")
-    return bool(re.search(r"(^|\s)(mw:Transclusion|mw:Placeholder)\b", typeof))
+    typeof = tag.get("attributes", EMPTY_ATTRIBUTES).get("typeof", "")
+    return TRANSCLUSION_RE.search(typeof) is not None
 
 
 def is_transclusion_fragment(tag):
     """Check if tag is a transclusion fragment."""
-    return cxutil.get_prop(["attributes", "about"], tag) and not cxutil.get_prop(["attributes", "data-mw"], tag)
+    attributes = tag.get("attributes", EMPTY_ATTRIBUTES)
+    return attributes.get("about") and not attributes.get("data-mw")
 
 
 def is_non_translatable(tag):
@@ -239,20 +273,19 @@ def is_non_translatable(tag):
     Returns:
         Whether the tag is non-translatable
     """
-    non_translatable_tags = ["style", "svg", "script"]
-    non_translatable_rdfa = ["mw:Entity", "mw:Extension/math", "mw:Extension/references", "mw:Transclusion"]
-
-    if tag["name"] in non_translatable_tags:
+    if tag["name"] in NON_TRANSLATABLE_TAGS:
         return True
 
-    if not tag.get("attributes"):
+    attributes = tag.get("attributes")
+    if not attributes:
         return False
 
-    rel = tag.get("attributes", {}).get("rel", "").split()
-    typeof = tag.get("attributes", {}).get("typeof", "").split()
-    rdfa = rel + typeof
-
-    return any(ntr in rdfa for ntr in non_translatable_rdfa)
+    # Most tags carry neither attribute, so only split the ones that are present
+    rel = attributes.get("rel")
+    if rel and not NON_TRANSLATABLE_RDFA.isdisjoint(rel.split()):
+        return True
+    typeof = attributes.get("typeof")
+    return bool(typeof) and not NON_TRANSLATABLE_RDFA.isdisjoint(typeof.split())
 
 
 def is_inline_empty_tag(tag_name):
@@ -265,8 +298,7 @@ def is_inline_empty_tag(tag_name):
     Returns:
         Whether the tag is an inline empty tag
     """
-    inline_empty_tags = ["br", "img", "source", "track", "link", "meta"]
-    return tag_name in inline_empty_tags
+    return tag_name in INLINE_EMPTY_TAGS
 
 
 def get_chunk_boundary_groups(boundaries, chunks, get_length):
@@ -286,28 +318,18 @@ def get_chunk_boundary_groups(boundaries, chunks, get_length):
     """
     groups = []
     offset = 0
-    boundary_ptr = 0
 
     # Get boundaries in order, disregarding the start of the first chunk
     boundaries = sorted(boundaries)
-    while boundary_ptr < len(boundaries) and boundaries[boundary_ptr] == 0:
-        boundary_ptr += 1
+    boundary_ptr = bisect_right(boundaries, 0)
 
     for chunk in chunks:
-        group_boundaries = []
         chunk_length = get_length(chunk)
-
-        while boundary_ptr < len(boundaries):
-            boundary = boundaries[boundary_ptr]
-            if boundary > offset + chunk_length - 1:
-                # beyond the interior of this chunk
-                break
-            # inside the interior of this chunk
-            group_boundaries.append(boundary)
-            boundary_ptr += 1
-
+        # Boundaries up to the last offset inside the interior of this chunk
+        end_ptr = bisect_right(boundaries, offset + chunk_length - 1, boundary_ptr)
         offset += chunk_length
-        groups.append({"chunk": chunk, "boundaries": group_boundaries})
+        groups.append({"chunk": chunk, "boundaries": boundaries[boundary_ptr:end_ptr]})
+        boundary_ptr = end_ptr
 
     return groups
 
@@ -326,29 +348,28 @@ def add_common_tag(text_chunks, tag):
     if len(text_chunks) == 0:
         return []
 
-    # Find length of common tags
-    common_tags = text_chunks[0].tags[:]
-    for i in range(1, len(text_chunks)):
-        tags = text_chunks[i].tags
+    # Find length of common tags; only the length is needed, so no prefix copies
+    first_tags = text_chunks[0].tags
+    common_tag_length = len(first_tags)
+    for t_chunk in text_chunks[1:]:
+        if not common_tag_length:
+            break
+        tags = t_chunk.tags
+        length = min(common_tag_length, len(tags))
         j = 0
-        for j in range(min(len(common_tags), len(tags))):
-            if common_tags[j] is not tags[j]:
-                break
-        else:
+        while j < length and first_tags[j] is tags[j]:
             j += 1
-        if len(common_tags) > j:
-            common_tags = common_tags[:j]
-
-    common_tag_length = len(common_tags)
+        common_tag_length = j
 
     # Build new chunks with segment span inserted
-    new_text_chunks = []
-    for t_chunk in text_chunks:
-        new_tags = t_chunk.tags[:]
-        new_tags.insert(common_tag_length, tag)
-        new_text_chunks.append(text_chunk(t_chunk.text, new_tags, t_chunk.inline_content))
-
-    return new_text_chunks
+    return [
+        text_chunk(
+            t_chunk.text,
+            t_chunk.tags[:common_tag_length] + [tag] + t_chunk.tags[common_tag_length:],
+            t_chunk.inline_content,
+        )
+        for t_chunk in text_chunks
+    ]
 
 
 def set_link_ids_in_place(text_chunks, get_next_id):
@@ -361,12 +382,13 @@ def set_link_ids_in_place(text_chunks, get_next_id):
     """
     for t_chunk in text_chunks:
         for tag in t_chunk.tags:
+            if tag["name"] != "a":
+                continue
+            attributes = tag.get("attributes", EMPTY_ATTRIBUTES)
             if (
-                tag["name"] == "a"
-                and tag.get("attributes", {}).get("href") is not None
-                and tag.get("attributes", {}).get("rel")
-                and f" {tag['attributes']['rel']} ".find(" mw:WikiLink ") != -1
-                and tag.get("attributes", {}).get("data-linkid") is None
+                attributes.get("href") is not None
+                and "mw:WikiLink" in attributes.get("rel", "").split()
+                and attributes.get("data-linkid") is None
             ):
 
                 # Copy href, then remove it, then re-add it
@@ -381,6 +403,7 @@ def set_link_ids_in_place(text_chunks, get_next_id):
                 tag["attributes"]["class"] = "cx-link"
                 tag["attributes"]["data-linkid"] = get_next_id("link")
                 tag["attributes"]["href"] = href
+                tag.pop("openTagHtml", None)
 
 
 def is_ignorable_block(section_doc):
@@ -399,9 +422,7 @@ def is_ignorable_block(section_doc):
 
     # We start with index 1 since the first tag will be <section>.
     for i in range(1, len(section_doc.items)):
-        item = section_doc.items[i]
-        tag = item["item"]
-        item_type = item["type"]
+        item_type, tag = section_doc.items[i]
 
         if item_type == "open":
             block_stack.append(tag)
@@ -417,8 +438,8 @@ def is_ignorable_block(section_doc):
                     and (
                         (
                             is_transclusion(current_close_tag)
-                            and current_close_tag.get("attributes", {}).get("about")
-                            == first_block_template.get("attributes", {}).get("about")
+                            and current_close_tag.get("attributes", EMPTY_ATTRIBUTES).get("about")
+                            == first_block_template.get("attributes", EMPTY_ATTRIBUTES).get("about")
                         )
                         or is_reference_list(current_close_tag)
                     )
@@ -427,7 +448,7 @@ def is_ignorable_block(section_doc):
 
         # Also check for textblocks
         if not first_block_template and item_type == "textblock":
-            root_item = item["item"].get_root_item()
+            root_item = tag.get_root_item()
             if root_item and is_non_translatable(root_item):
                 first_block_template = root_item
                 ignorable = True
@@ -2,8 +2,11 @@
 Main processing module for HTML transformation.
 """
 
+import multiprocessing
 import os
-import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import yaml
 
@@ -17,6 +20,117 @@ with open(config_path, "r") as f:
 
 removable_sections = pageloader_config.get("removableSections", {})
 
+# Inputs at least this large have their sentence boundaries computed in a
+# process pool. Below it, the pickling round trip costs more than it saves.
+PARALLEL_SEGMENTATION_THRESHOLD = 100 * 1024
+
+# Upper bound on the segmentation pool size. Every process that imports this
+# module (e.g. each gunicorn worker) starts its own pool, so the total number
+# of segmentation processes is the worker count times this value.
+MAX_SEGMENTATION_WORKERS = 4
+
+_segmentation_pool = None
+_segmentation_pool_lock = threading.Lock()
+
+# Parsers configured for process_html, per thread; Parser.init resets one between documents
+_thread_local = threading.local()
+
+# CXSegmenter keeps no per-document state, so one instance serves every call
+_cx_segmenter = CXSegmenter()
+
+
+def _get_segmentation_workers():
+    """Number of processes in the sentence boundary pool."""
+    return min(MAX_SEGMENTATION_WORKERS, os.cpu_count() or 1)
+
+
+def _get_segmentation_pool():
+    """Create the sentence boundary process pool on first use."""
+    global _segmentation_pool
+    with _segmentation_pool_lock:
+        if _segmentation_pool is None:
+            # The first large request creates the pool from a request thread; forking a
+            # threaded server can copy locks held by other threads into the workers, so
+            # they are started from a clean forkserver process instead
+            _segmentation_pool = ProcessPoolExecutor(
+                max_workers=_get_segmentation_workers(), mp_context=multiprocessing.get_context("forkserver")
+            )
+        return _segmentation_pool
+
+
+def _discard_segmentation_pool(pool):
+    """Drop a broken pool so that the next large input starts a fresh one."""
+    global _segmentation_pool
+    with _segmentation_pool_lock:
+        if _segmentation_pool is pool:
+            _segmentation_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_segmentation_pool():
+    """Stop the sentence boundary process pool, if one was started."""
+    global _segmentation_pool
+    with _segmentation_pool_lock:
+        pool, _segmentation_pool = _segmentation_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _get_parser():
+    """Get this thread's parser for process_html, creating it on first use."""
+    parser = getattr(_thread_local, "parser", None)
+    if parser is None:
+        parser = _thread_local.parser = Parser(
+            mw_contextualizer({"removableSections": removable_sections}), {"wrapSections": True}
+        )
+    return parser
+
+
+def _get_boundaries(text, language="en"):
+    """Compute sentence boundaries for one text; runs in a pool worker."""
+    return _cx_segmenter.get_segmenter(language)(text)
+
+
+def _get_parallel_segmenter(parsed_doc, language, pool):
+    """
+    Precompute sentence boundaries for every segmentable text block in parallel.
+
+    Parsing, section wrapping and ID assignment depend on document order, so
+    they stay in this process. Boundary detection only sees one text block's
+    plain text at a time, which makes it the part that is safe to fan out.
+
+    Args:
+        parsed_doc: Parsed Doc object
+        language: Language code
+        pool: Process pool to compute the boundaries in
+
+    Returns:
+        Function that returns sentence boundary offsets
+
+    Raises:
+        BrokenProcessPool: A pool worker died, e.g. it was killed for running out of memory
+    """
+    texts = list(
+        dict.fromkeys(
+            item_obj.get_plain_text()
+            for item_type, item_obj in parsed_doc.items
+            if item_type == "textblock" and item_obj.can_segment
+        )
+    )
+    chunksize = max(1, len(texts) // (4 * _get_segmentation_workers()))
+    boundaries = dict(
+        zip(texts, pool.map(_get_boundaries, texts, [language] * len(texts), chunksize=chunksize), strict=True)
+    )
+    fallback = _cx_segmenter.get_segmenter(language)
+
+    def segmenter(text):
+        """Look up precomputed boundaries, segmenting in-process on a miss."""
+        if text in boundaries:
+            return boundaries[text]
+        return fallback(text)
+
+    return segmenter
+
 
 def normalize(html):
     """
@@ -30,8 +144,9 @@ def normalize(html):
     """
     normalizer = Normalizer()
     normalizer.init()
-    # Remove tabs, carriage returns, and newlines
-    html = re.sub(r"[\t\r\n]+", "", html)
+    # Remove tabs, carriage returns, and newlines; chained replaces beat both
+    # the regex and str.translate here, as in utils.esc
+    html = html.replace("\t", "").replace("\r", "").replace("\n", "")
     normalizer.write(html)
     return normalizer.get_html()
 
@@ -47,20 +162,34 @@ def process_html(source_html):
     4. Segments text for translation (sentence boundaries)
     5. Adds tracking IDs (segments, links)
 
+    Sentence boundaries for inputs of at least PARALLEL_SEGMENTATION_THRESHOLD
+    characters are computed in a process pool when more than one CPU is
+    available; everything else runs in-process.
+
     Args:
         source_html: Source HTML string
 
     Returns:
         Processed HTML string
     """
-    parser = Parser(mw_contextualizer({"removableSections": removable_sections}), {"wrapSections": True})
-
+    parser = _get_parser()
     parser.init()
     parser.write(source_html)
     parsed_doc = parser.builder.doc
+    # The parser outlives this call; reset it so it does not keep the document alive
+    parser.init()
     parsed_doc = parsed_doc.wrap_sections()
 
-    segmented_doc = CXSegmenter().segment(parsed_doc, "en")
+    if len(source_html) >= PARALLEL_SEGMENTATION_THRESHOLD and (os.cpu_count() or 1) > 1:
+        pool = _get_segmentation_pool()
+        try:
+            segmented_doc = parsed_doc.segment(_get_parallel_segmenter(parsed_doc, "en", pool))
+        except BrokenProcessPool:
+            # A broken pool fails every later call; replace it and segment this input in-process
+            _discard_segmentation_pool(pool)
+            segmented_doc = _cx_segmenter.segment(parsed_doc, "en")
+    else:
+        segmented_doc = _cx_segmenter.segment(parsed_doc, "en")
 
     result = segmented_doc.get_html()
 
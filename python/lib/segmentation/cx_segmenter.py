@@ -2,8 +2,36 @@
 CXSegmenter - Sentence segmentation for Content Translation.
 """
 
+import functools
+import threading
+
 import pysbd
 
+# pysbd.Segmenter keeps the text being segmented on the instance, so cached
+# instances are kept per thread rather than shared across request threads
+_thread_local = threading.local()
+
+
+def _get_pysbd_segmenter(language):
+    """
+    Get this thread's pysbd Segmenter for the given language.
+
+    Args:
+        language: Language code
+
+    Returns:
+        pysbd.Segmenter instance
+    """
+    segmenters = getattr(_thread_local, "segmenters", None)
+    if segmenters is None:
+        segmenters = _thread_local.segmenters = {}
+    seg = segmenters.get(language)
+    if seg is None:
+        # pysbd locates every sentence in the original text to build its output
+        # anyway; char_span=True hands back those offsets instead of discarding them
+        seg = segmenters[language] = pysbd.Segmenter(language=language, clean=False, char_span=True)
+    return seg
+
 
 class CXSegmenter:
     """Segmenter for CX documents."""
@@ -19,7 +47,18 @@ class CXSegmenter:
         Returns:
             Segmented Doc object
         """
-        return parsed_doc.segment(self.get_segmenter(language))
+        segmenter = self.get_segmenter(language)
+        # Articles repeat short blocks (captions, "See also" items, table cells);
+        # segment each distinct text once per document
+        boundaries_by_text = {}
+
+        def get_boundaries(text):
+            boundaries = boundaries_by_text.get(text)
+            if boundaries is None:
+                boundaries = boundaries_by_text[text] = segmenter(text)
+            return boundaries
+
+        return parsed_doc.segment(get_boundaries)
 
     def get_segmenter(self, language):
         """
@@ -31,23 +70,30 @@ class CXSegmenter:
         Returns:
             Function that returns sentence boundary offsets
         """
+        return _get_boundary_segmenter(language)
 
-        def segmenter(text):
-            """Segment text into sentences."""
-            seg = pysbd.Segmenter(language=language, clean=False)
-            sentences = seg.segment(text)
-            boundaries = []
-
-            # Track position to avoid finding duplicate sentences
-            current_pos = 0
-            for sentence in sentences:
-                if sentence.strip():
-                    # Find from current position onward
-                    idx = text.find(sentence, current_pos)
-                    if idx != -1:
-                        boundaries.append(idx)
-                        current_pos = idx + len(sentence)
 
-            return boundaries
+@functools.lru_cache(maxsize=64)
+def _get_boundary_segmenter(language):
+    """
+    Build the boundary function for a language once and reuse it.
+
+    Args:
+        language: Language code
+
+    Returns:
+        Function that returns sentence boundary offsets
+    """
+
+    def segmenter(text):
+        """Segment text into sentences."""
+        # Whitespace-only text can only yield blank sentences, which are skipped
+        # anyway, so don't pay for a pysbd run on it
+        if not text or text.isspace():
+            return []
+
+        return [
+            span.start for span in _get_pysbd_segmenter(language).segment(text) if span.sent and not span.sent.isspace()
+        ]
 
-        return segmenter
+    return segmenter
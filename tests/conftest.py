@@ -1,7 +1,8 @@
-import os
-import sys
-from pathlib import Path
+"""
+Shared pytest configuration.
 
-# Add the parent directory to the path
-
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "cxsever" / "www" / "python"))
+The repository root is put on sys.path by ``pythonpath = .`` in pytest.ini,
+so tests import the package as ``python.lib`` and the Flask app as
+``python.app``. app.py picks the matching ``lib`` import itself, so only
+one copy of the package is ever loaded.
+"""
@@ -0,0 +1,43 @@
+"""
+Integration tests for the Flask app in app.py.
+"""
+
+import orjson
+import pytest
+from python.app import app
+
+
+@pytest.fixture
+def client():
+    """Flask test client for the app."""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+class TestProcessTextEndpoint:
+    """Test the /textp endpoint."""
+
+    def test_valid_json(self, client):
+        """Test that valid HTML is processed into segmented output."""
+        response = client.post("/textp", json={"html": "<html><body><p>Hello world. Second one.</p></body></html>"})
+        assert response.status_code == 200
+        data = orjson.loads(response.data)
+        assert data["success"] is True
+        assert "cx-segment" in data["result"]
+
+    def test_invalid_json(self, client):
+        """Test that a malformed JSON body gets a JSON 400 error."""
+        response = client.post("/textp", data=b'{"html": ', content_type="application/json")
+        assert response.status_code == 400
+        assert orjson.loads(response.data) == {"result": "Invalid JSON payload", "success": False}
+
+    def test_oversized_body(self, client, monkeypatch):
+        """Test that a body over MAX_CONTENT_LENGTH gets a JSON 413 error, not Flask's HTML page."""
+        monkeypatch.setitem(app.config, "MAX_CONTENT_LENGTH", 64)
+        response = client.post("/textp", json={"html": "<p>" + "x" * 100 + "</p>"})
+        assert response.status_code == 413
+        assert response.mimetype == "application/json"
+        data = orjson.loads(response.data)
+        assert data["success"] is False
+        assert "maximum allowed size" in data["result"]
@@ -4,7 +4,6 @@ Comprehensive test suite for the CX HTML processing pipeline.
 """
 
 import json
-import os
 import sys
 
 from python.lib.lineardoc import Doc, Parser, mw_contextualizer, text_block
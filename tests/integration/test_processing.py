@@ -3,15 +3,15 @@ Test the HTML processing pipeline.
 """
 
 import os
-import sys
 from pathlib import Path
 
 from python.lib.processor import process_html
 
+fixtures_dir = Path(__file__).resolve().parent.parent / "fixtures"
+
 
 def run_processing_test(num):
     """Test HTML processing with a specific fixture file number."""
-    fixtures_dir = Path(__file__).resolve().parent.parent / "fixtures"
     input_path = fixtures_dir / f"input_{num}.html"
     output_path = fixtures_dir / f"output_{num}.html"
 
@@ -21,15 +21,18 @@ def run_processing_test(num):
     # Process the input
     result = process_html(input_html)
 
-    # Save result for inspection
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(result)
-
-    # Validation
-    assert "<section" in result, f"Result {num} should contain section tags"
-    assert "cx-segment" in result, f"Result {num} should contain cx-segment spans"
-    assert "data-segmentid" in result, f"Result {num} should contain segment IDs"
-    assert len(result) > len(input_html) * 0.5, f"Result {num} should have reasonable size"
+    # Validation; output_N.html is written when a check fails, or always with CX_WRITE_OUTPUTS=1
+    try:
+        assert "<section" in result, f"Result {num} should contain section tags"
+        assert "cx-segment" in result, f"Result {num} should contain cx-segment spans"
+        assert "data-segmentid" in result, f"Result {num} should contain segment IDs"
+        assert len(result) > len(input_html) * 0.5, f"Result {num} should have reasonable size"
+    except AssertionError:
+        output_path.write_text(result, encoding="utf-8")
+        raise
+
+    if os.environ.get("CX_WRITE_OUTPUTS"):
+        output_path.write_text(result, encoding="utf-8")
 
 
 def test_processing_1():
@@ -190,3 +190,51 @@ class TestProcessHtmlConfiguration:
         result = process_html(html)
         # Should process normally
         assert "Normal content" in result
+
+    def test_process_html_reused_parser_forgets_removed_transclusions(self):
+        """Test that a transclusion removed from one document does not affect the next."""
+        process_html('<div class="navbox" about="#mwt1">Navigation.</div><p>First page.</p>')
+        result = process_html('<p about="#mwt1">Second page.</p>')
+        assert "Second page." in result
+
+    def test_process_html_reused_parser_releases_document(self):
+        """Test that the kept parser does not hold on to the last document."""
+        from python.lib import processor
+
+        process_html("<p>Some content.</p>")
+        assert processor._get_parser().builder.doc.items == []
+
+    def test_process_html_parallel_segmentation_matches_in_process(self, monkeypatch):
+        """Test that pooled boundary detection gives the same output as in-process."""
+        from python.lib import processor
+
+        html = "<h2>Heading</h2>" + "".join(f"<p>Sentence {i} here. Another one for {i}.</p>" for i in range(20))
+        expected = process_html(html)
+        monkeypatch.setattr(processor, "PARALLEL_SEGMENTATION_THRESHOLD", 0)
+        monkeypatch.setattr(processor.os, "cpu_count", lambda: 2)
+        try:
+            assert process_html(html) == expected
+        finally:
+            processor.shutdown_segmentation_pool()
+
+    def test_process_html_recovers_from_broken_segmentation_pool(self, monkeypatch):
+        """Test that a pool with a dead worker is replaced instead of failing every later call."""
+        from python.lib import processor
+
+        html = "".join(f"<p>Sentence {i} here. Another one for {i}.</p>" for i in range(20))
+        expected = process_html(html)
+        monkeypatch.setattr(processor, "PARALLEL_SEGMENTATION_THRESHOLD", 0)
+        monkeypatch.setattr(processor.os, "cpu_count", lambda: 2)
+        try:
+            assert process_html(html) == expected
+            broken_pool = processor._segmentation_pool
+            for worker in list(broken_pool._processes.values()):
+                worker.kill()
+                worker.join()
+
+            assert process_html(html) == expected
+            assert processor._segmentation_pool is not broken_pool
+            # The replacement pool works again
+            assert process_html(html) == expected
+        finally:
+            processor.shutdown_segmentation_pool()
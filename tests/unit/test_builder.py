@@ -2,9 +2,6 @@
 Unit tests for lineardoc/builder.py module.
 """
 
-import os
-import sys
-
 import pytest
 from python.lib.lineardoc import Doc
 from python.lib.lineardoc.builder import Builder
@@ -103,6 +100,23 @@ class TestBuilderTextChunks:
         builder.add_text_chunk("Hello", True)
         assert len(builder.text_chunks) > 0
 
+    def test_add_text_chunk_shares_tag_snapshot(self):
+        """Test that chunks added under the same annotation stack share one tag list."""
+        builder = Builder()
+        tag = {"name": "b", "attributes": {}}
+        builder.push_inline_annotation_tag(tag)
+        builder.add_text_chunk("Hello", True)
+        builder.add_text_chunk(" world", True)
+        first, second = builder.text_chunks
+        assert first.tags is second.tags
+        assert first.tags == [tag]
+        assert first.tags is not builder.inline_annotation_tags
+
+        builder.pop_inline_annotation_tag("b")
+        builder.add_text_chunk("!", True)
+        assert builder.text_chunks[-1].tags == []
+        assert first.tags == [tag]
+
     def test_finish_text_block(self):
         """Test finishing a text block."""
         builder = Builder()
@@ -2,9 +2,6 @@
 Unit tests for lineardoc/contextualizer.py and lineardoc/mw_contextualizer.py modules.
 """
 
-import os
-import sys
-
 import pytest
 from python.lib.lineardoc.contextualizer import Contextualizer
 from python.lib.lineardoc.mw_contextualizer import mw_contextualizer
@@ -50,6 +47,18 @@ class TestContextualizer:
         ctx = Contextualizer()
         assert ctx.can_segment() is True
 
+    def test_get_child_context_typeof_token_boundary(self):
+        """Test that typeof values are matched on a token prefix, as Parsoid subtypes them."""
+        ctx = mw_contextualizer()
+        tag = {"name": "span", "attributes": {"typeof": "mw:Placeholder/StrippedTag"}}
+        assert ctx.get_child_context(tag) == "verbatim"
+        tag = {"name": "span", "attributes": {"typeof": "mw:File/Thumb"}}
+        assert ctx.get_child_context(tag) == "media-inline"
+        tag = {"name": "a", "attributes": {"rel": "mw:WikiLink"}}
+        assert ctx.get_child_context(tag) is None
+        tag = {"name": "span", "attributes": {"typeof": "xmw:Transclusion"}}
+        assert ctx.get_child_context(tag) is None
+
     def test_get_child_context_figure(self):
         """Test child context for figure tag."""
         ctx = Contextualizer()
@@ -84,7 +93,7 @@ class Testmw_contextualizer:
     def test_mw_contextualizer_creation(self):
         """Test creating MW contextualizer."""
         ctx = mw_contextualizer()
-        assert ctx.removable_transclusion_fragments == []
+        assert ctx.removable_transclusion_fragments == set()
 
     def test_can_segment_content_branch(self):
         """Test can_segment in contentBranch context."""
@@ -171,6 +180,15 @@ class Testmw_contextualizer:
         tag = {"name": "div", "attributes": {"class": "content"}}
         assert ctx.is_removable(tag) is False
 
+    def test_is_removable_classes_only_skips_data_mw(self):
+        """Test that data-mw is not parsed when no templates are configured."""
+        config = {"removableSections": {"classes": ["navbox"]}}
+        ctx = mw_contextualizer(config)
+        tag = {"name": "div", "attributes": {"data-mw": "not json", "class": "content"}}
+        assert ctx.is_removable(tag) is False
+        assert ctx.has_removable_sections is True
+        assert ctx.removable_templates == []
+
     def test_is_removable_transclusion_fragments(self):
         """Test that transclusion fragments are tracked."""
         config = {"removableSections": {"classes": ["navbox"]}}
@@ -191,6 +209,16 @@ class Testmw_contextualizer:
         tag2 = {"name": "span", "attributes": {"about": "#mwt1"}}
         assert ctx.is_removable(tag2) is True
 
+    def test_reset_forgets_document_state(self):
+        """Test that reset clears the context stack and removed fragments but keeps the config."""
+        config = {"removableSections": {"classes": ["navbox"]}}
+        ctx = mw_contextualizer(config)
+        ctx.on_open_tag({"name": "div", "attributes": {"class": "navbox", "about": "#mwt1"}})
+        ctx.reset()
+        assert ctx.contexts == []
+        assert ctx.removable_transclusion_fragments == set()
+        assert ctx.is_removable({"name": "div", "attributes": {"class": "navbox"}}) is True
+
     def test_is_removable_by_template(self):
         """Test removing elements by template name."""
         config = {"removableSections": {"templates": ["Infobox"]}}
@@ -204,6 +232,19 @@ class Testmw_contextualizer:
         }
         assert ctx.is_removable(tag) is True
 
+    def test_is_removable_reuses_parsed_data_mw(self):
+        """Test that data-mw is parsed once per tag and reused."""
+        config = {"removableSections": {"templates": ["Infobox"]}}
+        ctx = mw_contextualizer(config)
+        tag = {
+            "name": "div",
+            "attributes": {"data-mw": '{"parts":[{"template":{"target":{"wt":"Navbox"}}}]}'},
+        }
+        assert ctx.is_removable(tag) is False
+        parsed = tag["parsedDataMw"]
+        assert ctx.is_removable(tag) is False
+        assert tag["parsedDataMw"] is parsed
+
     def test_is_removable_by_template_regex(self):
         """Test removing elements by template regex."""
         config = {"removableSections": {"templates": ["/^Template:Info/"]}}
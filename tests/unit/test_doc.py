@@ -2,11 +2,8 @@
 Unit tests for lineardoc/doc.py module.
 """
 
-import os
-import sys
-
 import pytest
-from python.lib.lineardoc import Doc, text_block, text_chunk
+from python.lib.lineardoc import Doc, DocItem, text_block, text_chunk
 
 
 class TestDocCreation:
@@ -62,6 +59,19 @@ class TestDocAddItem:
         assert len(doc.items) == 1
         assert doc.items[0]["type"] == "blockspace"
 
+    def test_add_item_named_tuple(self):
+        """Test that items are DocItem tuples with attribute and unpacking access."""
+        doc = Doc()
+        tag = {"name": "p", "attributes": {}}
+        doc.add_item("open", tag)
+        item = doc.items[0]
+        assert isinstance(item, DocItem)
+        assert item.type == "open"
+        assert item.item is tag
+        item_type, item_obj = item
+        assert (item_type, item_obj) == ("open", tag)
+        assert item[0] == "open"
+
     def test_add_item_chaining(self):
         """Test that add_item returns self for chaining."""
         doc = Doc()
@@ -177,6 +187,24 @@ class TestDocGetHtml:
         # But text should still be there
         assert "text" in html
 
+    def test_write_html_appends_to_list(self):
+        """Test that write_html appends the same HTML that get_html returns."""
+        doc = Doc()
+        doc.add_item("open", {"name": "p", "attributes": {}})
+        doc.add_item("textblock", text_block([text_chunk("text", [])]))
+        doc.add_item("close", {"name": "p"})
+        html = ["<div>"]
+        doc.write_html(html)
+        assert html[0] == "<div>"
+        assert "".join(html[1:]) == doc.get_html()
+
+    def test_get_html_unknown_item_type(self):
+        """Test that an unknown item type is reported."""
+        doc = Doc()
+        doc.add_item("comment", "x")
+        with pytest.raises(Exception, match="Unknown item type: comment"):
+            doc.get_html()
+
 
 class TestDocClone:
     """Test clone method."""
@@ -267,3 +295,23 @@ class TestDocGetSegments:
         segments = doc.get_segments()
         # Should only have one segment (the textblock)
         assert len(segments) == 1
+
+
+class TestDocSegmentRendering:
+    """Test rendering the same tags before and after segmentation."""
+
+    def test_get_html_after_segment_reflects_link_ids(self):
+        """Test that open tags rendered before segment are re-rendered once segment edits them."""
+        link = {"name": "a", "attributes": {"href": "./Foo", "rel": "mw:WikiLink"}}
+        doc = Doc()
+        doc.add_item("open", {"name": "p", "attributes": {"id": "para"}})
+        doc.add_item("textblock", text_block([text_chunk("See ", []), text_chunk("Foo", [link]), text_chunk(".", [])]))
+        doc.add_item("close", {"name": "p"})
+
+        assert doc.get_html() == '<p id="para">See <a href="./Foo" rel="mw:WikiLink">Foo</a>.</p>'
+
+        segmented = doc.segment(lambda text: [0])
+        assert segmented.get_html() == (
+            '<p id="para"><span class="cx-segment" data-segmentid="0">'
+            'See <a class="cx-link" data-linkid="1" href="./Foo" rel="mw:WikiLink">Foo</a>.</span></p>'
+        )
@@ -2,9 +2,6 @@
 Unit tests for lineardoc/normalizer.py module.
 """
 
-import os
-import sys
-
 import pytest
 from python.lib.lineardoc.normalizer import Normalizer
 
@@ -113,3 +110,12 @@ class TestNormalizer:
         norm.write("<div>مرحبا</div>")
         result = norm.get_html()
         assert "مرحبا" in result
+
+    def test_normalize_skips_comments_keeps_tail(self):
+        """Test that comments are dropped but the text after them is kept."""
+        norm = Normalizer()
+        norm.init()
+        norm.write("<div>before<!-- comment -->after</div>")
+        result = norm.get_html()
+        assert "comment" not in result
+        assert "<div>beforeafter</div>" in result
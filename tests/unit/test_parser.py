@@ -2,11 +2,8 @@
 Unit tests for lineardoc/parser.py module.
 """
 
-import os
-import sys
-
 import pytest
-from python.lib.lineardoc import Contextualizer, Parser
+from python.lib.lineardoc import Contextualizer, Parser, mw_contextualizer
 
 
 class TestParserCreation:
@@ -46,8 +43,6 @@ class TestParserWrite:
 
     def test_write_simple_html(self):
         """Test parsing simple HTML."""
-        from python.lib.lineardoc import mw_contextualizer
-
         ctx = mw_contextualizer()
         parser = Parser(ctx)
         parser.init()
@@ -57,8 +52,6 @@ class TestParserWrite:
 
     def test_write_nested_html(self):
         """Test parsing nested HTML."""
-        from python.lib.lineardoc import mw_contextualizer
-
         ctx = mw_contextualizer()
         parser = Parser(ctx)
         parser.init()
@@ -67,8 +60,6 @@ class TestParserWrite:
 
     def test_write_with_attributes(self):
         """Test parsing HTML with attributes."""
-        from python.lib.lineardoc import mw_contextualizer
-
         ctx = mw_contextualizer()
         parser = Parser(ctx)
         parser.init()
@@ -78,8 +69,6 @@ class TestParserWrite:
 
     def test_write_invalid_html(self):
         """Test parsing invalid HTML - should try wrapping."""
-        from python.lib.lineardoc import mw_contextualizer
-
         ctx = mw_contextualizer()
         parser = Parser(ctx)
         parser.init()
@@ -94,14 +83,19 @@ class TestParserWrite:
 
     def test_write_unicode(self):
         """Test parsing Unicode HTML."""
-        from python.lib.lineardoc import mw_contextualizer
-
         ctx = mw_contextualizer()
         parser = Parser(ctx)
         parser.init()
         parser.write("<div>مرحبا العالم</div>")
         assert len(parser.builder.doc.items) > 0
 
+    def test_write_unicode_without_charset(self):
+        """Test that non-ASCII text survives without a meta charset declaration."""
+        parser = Parser(mw_contextualizer())
+        parser.init()
+        parser.write("<p>माउज़र पिस्तौल café</p>")
+        assert "माउज़र पिस्तौल café" in parser.builder.doc.get_html()
+
 
 class TestParserInlineAnnotationTag:
     """Test is_inline_annotation_tag method."""
@@ -136,6 +130,23 @@ class TestParserInlineAnnotationTag:
         parser = Parser(ctx)
         assert parser.is_inline_annotation_tag("i", False) is True
 
+    def test_is_inline_annotation_tag_media_contexts(self):
+        """Test the media-context exceptions for span, audio and video."""
+        ctx = Contextualizer()
+        parser = Parser(ctx)
+        ctx.contexts.append("media")
+        assert parser.is_inline_annotation_tag("span", False) is False
+        assert parser.is_inline_annotation_tag("audio", False) is False
+        ctx.contexts[-1] = "media-inline"
+        assert parser.is_inline_annotation_tag("span", False) is True
+        assert parser.is_inline_annotation_tag("video", False) is True
+
+    def test_is_inline_annotation_tag_style_transclusion(self):
+        """Test style is inline only when it is a transclusion."""
+        parser = Parser(Contextualizer())
+        assert parser.is_inline_annotation_tag("style", True) is True
+        assert parser.is_inline_annotation_tag("style", False) is False
+
 
 class TestParserBlockTags:
     """Test block tag constants."""
@@ -144,7 +155,7 @@ class TestParserBlockTags:
         """Test that BLOCK_TAGS is defined."""
         from python.lib.lineardoc.parser import BLOCK_TAGS
 
-        assert isinstance(BLOCK_TAGS, list)
+        assert isinstance(BLOCK_TAGS, frozenset)
         assert "div" in BLOCK_TAGS
         assert "p" in BLOCK_TAGS
         assert "h1" in BLOCK_TAGS
@@ -159,14 +170,20 @@ class TestParserBlockTags:
         assert "b" not in BLOCK_TAGS
         assert "i" not in BLOCK_TAGS
 
+    def test_lower_tag_name_reused(self):
+        """Test that lowercased tag names are computed once and shared."""
+        from python.lib.lineardoc.parser import lower_tag_name
+
+        name = "".join(["SE", "CTION"])
+        assert lower_tag_name(name) == "section"
+        assert lower_tag_name(name) is lower_tag_name("".join(["SECT", "ION"]))
+
 
 class TestParserIntegration:
     """Test parser integration."""
 
     def test_parse_complete_document(self):
         """Test parsing a complete HTML document."""
-        from python.lib.lineardoc import mw_contextualizer
-
         ctx = mw_contextualizer()
         parser = Parser(ctx)
         parser.init()
@@ -191,8 +208,6 @@ class TestParserIntegration:
 
     def test_parse_with_text_content(self):
         """Test parsing with text content."""
-        from python.lib.lineardoc import mw_contextualizer
-
         ctx = mw_contextualizer()
         parser = Parser(ctx)
         parser.init()
@@ -201,3 +216,86 @@ class TestParserIntegration:
         doc = parser.builder.doc
         output = doc.get_html()
         assert "This is a test." in output
+
+    def test_parse_streams_large_document(self):
+        """Test parsing input larger than one pull parser feed chunk."""
+        from python.lib.lineardoc.parser import FEED_CHUNK_SIZE
+
+        ctx = mw_contextualizer()
+        parser = Parser(ctx)
+        parser.init()
+
+        paragraphs = FEED_CHUNK_SIZE // 20 + 1
+        parser.write("<body>" + "<p>Some <b>bold</b> text.</p>" * paragraphs + "</body>")
+        output = parser.builder.doc.get_html()
+        assert output.count("<p>Some <b>bold</b> text.</p>") == paragraphs
+
+    def test_iter_sax_events_after_abandoned_document(self):
+        """Test that the reused pull parser does not leak events from an abandoned document."""
+        from python.lib.lineardoc.parser import iter_sax_events
+
+        events = iter_sax_events("<div><p>first</p><p>unread</p></div>")
+        next(events)
+        events.close()
+
+        names = [value.tag for event, value in iter_sax_events("<span>second</span>") if event == "open"]
+        assert names == ["html", "body", "span"]
+
+    def test_parse_media_span_inside_figure(self):
+        """Test that a media span opened as a block tag inside a figure also closes as one."""
+        ctx = mw_contextualizer()
+        parser = Parser(ctx)
+        parser.init()
+
+        parser.write(
+            '<body><figure typeof="mw:File/Thumb"><span typeof="mw:File"><img src="x"/></span>'
+            "<figcaption>Caption.</figcaption></figure></body>"
+        )
+        output = parser.builder.doc.get_html()
+        assert '<span typeof="mw:File"><img src="x" /></span>' in output
+        assert "<figcaption>Caption.</figcaption>" in output
+
+    def test_parse_empty_input(self):
+        """Test that empty input gives an empty document instead of an error."""
+        parser = Parser(mw_contextualizer())
+        parser.init()
+        parser.write("")
+        assert parser.builder.doc.items == []
+
+    def test_parse_skips_removable_subtree(self):
+        """Test that a removable subtree is dropped while its tail text is kept."""
+        ctx = mw_contextualizer({"removableSections": {"classes": ["navbox"]}})
+        parser = Parser(ctx)
+        parser.init()
+
+        parser.write('<body><div><div class="navbox"><p>Nav <b>links</b></p><br/></div>Kept text.</div></body>')
+        output = parser.builder.doc.get_html()
+        assert "navbox" not in output
+        assert "Nav" not in output
+        assert "Kept text." in output
+        assert parser.removable_depth == 0
+        assert ctx.contexts == []
+
+    def test_parse_deeply_nested_document(self):
+        """Test that nesting deeper than libxml2's default limit is kept."""
+        depth = 400
+        parser = Parser(mw_contextualizer())
+        parser.init()
+        parser.write("<body>" + "<div>" * depth + "Deep text." + "</div>" * depth + "</body>")
+        output = parser.builder.doc.get_html()
+        assert "Deep text." in output
+        assert output.count("<div>") == depth
+
+    def test_parse_fragment_with_sibling_blocks(self):
+        """Test that a fragment with several top-level blocks parses without a wrapper."""
+        parser = Parser(mw_contextualizer())
+        parser.init()
+        parser.write("<p>One</p><p>Two <b>bold</b></p>")
+        assert parser.builder.doc.get_html() == "<html><body><p>One</p><p>Two <b>bold</b></p></body></html>"
+
+    def test_parse_ignores_content_after_root(self):
+        """Test that markup after the closing </html> does not start a second root."""
+        parser = Parser(mw_contextualizer())
+        parser.init()
+        parser.write("<html><body><p>A.</p></body></html><html><body><p>B.</p></body></html>")
+        assert parser.builder.doc.get_html() == "<html><body><p>A.</p></body></html>"
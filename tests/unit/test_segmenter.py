@@ -2,9 +2,6 @@
 Unit tests for segmentation/cx_segmenter.py module.
 """
 
-import os
-import sys
-
 import pytest
 from python.lib.lineardoc import Doc, text_block, text_chunk
 from python.lib.segmentation.cx_segmenter import CXSegmenter
@@ -98,6 +95,17 @@ class TestCXSegmenter:
         boundaries = seg_func_es(text)
         assert len(boundaries) >= 1
 
+    def test_segment_repeated_sentences(self):
+        """Test that repeated sentences each get their own boundary."""
+        seg_func = CXSegmenter().get_segmenter("en")
+        assert seg_func("Go now. Go now. Go now.") == [0, 8, 16]
+        assert seg_func("  Lead. Next one.") == [2, 8]
+
+    def test_get_segmenter_reused_per_language(self):
+        """Test that the boundary function is built once per language."""
+        assert CXSegmenter().get_segmenter("en") is CXSegmenter().get_segmenter("en")
+        assert CXSegmenter().get_segmenter("en") is not CXSegmenter().get_segmenter("es")
+
     def test_segment_doc(self):
         """Test segmenting a Doc object."""
         segmenter = CXSegmenter()
@@ -111,6 +119,25 @@ class TestCXSegmenter:
         assert segmented is not None
         assert isinstance(segmented, Doc)
 
+    def test_segment_doc_reuses_boundaries_for_repeated_text(self):
+        """Test that identical text blocks in one document are segmented once."""
+        segmenter = CXSegmenter()
+        calls = []
+        real_segmenter = segmenter.get_segmenter("en")
+
+        def counting_segmenter(text):
+            calls.append(text)
+            return real_segmenter(text)
+
+        segmenter.get_segmenter = lambda language: counting_segmenter
+        doc = Doc()
+        for _ in range(3):
+            doc.add_item("textblock", text_block([text_chunk("Same text. Again.", [])], can_segment=True))
+
+        segmented = segmenter.segment(doc, "en")
+        assert calls == ["Same text. Again."]
+        assert len(segmented.items) == 3
+
     def test_segment_preserves_non_segmentable(self):
         """Test that non-segmentable blocks are preserved."""
         segmenter = CXSegmenter()
@@ -2,9 +2,6 @@
 Unit tests for lineardoc/text_block.py module.
 """
 
-import os
-import sys
-
 import pytest
 from python.lib.lineardoc.text_block import text_block
 from python.lib.lineardoc.text_chunk import text_chunk
@@ -31,19 +28,13 @@ class TestTextBlockCreation:
         """Test that offsets are calculated correctly."""
         chunks = [text_chunk("hello", []), text_chunk(" world", [])]
         block = text_block(chunks)
-        assert len(block.offsets) == 2
-        assert block.offsets[0]["start"] == 0
-        assert block.offsets[0]["length"] == 5
-        assert block.offsets[1]["start"] == 5
-        assert block.offsets[1]["length"] == 6
+        assert [(offset["start"], offset["length"]) for offset in block.offsets] == [(0, 5), (5, 6)]
 
     def test_text_block_empty_chunks(self):
         """Test text_block with empty chunks."""
         chunks = [text_chunk("", [])]
         block = text_block(chunks)
-        assert len(block.offsets) == 1
-        assert block.offsets[0]["start"] == 0
-        assert block.offsets[0]["length"] == 0
+        assert [(offset["start"], offset["length"]) for offset in block.offsets] == [(0, 0)]
 
 
 class TestTextBlockCommonTags:
@@ -61,9 +52,7 @@ class TestTextBlockCommonTags:
         chunks = [text_chunk("text", tags)]
         block = text_block(chunks)
         common = block.get_common_tags()
-        assert len(common) == 2
-        assert common[0]["name"] == "b"
-        assert common[1]["name"] == "i"
+        assert [tag["name"] for tag in common] == ["b", "i"]
 
     def test_get_common_tags_all_same(self):
         """Test getting common tags when all chunks have same tags."""
@@ -71,8 +60,7 @@ class TestTextBlockCommonTags:
         chunks = [text_chunk("hello", tags[:]), text_chunk(" world", tags[:])]
         block = text_block(chunks)
         common = block.get_common_tags()
-        assert len(common) == 1
-        assert common[0]["name"] == "b"
+        assert [tag["name"] for tag in common] == ["b"]
 
     def test_get_common_tags_partial_common(self):
         """Test getting common tags when only some are common."""
@@ -82,8 +70,7 @@ class TestTextBlockCommonTags:
         ]
         block = text_block(chunks)
         common = block.get_common_tags()
-        assert len(common) == 1
-        assert common[0]["name"] == "b"
+        assert [tag["name"] for tag in common] == ["b"]
 
     def test_get_common_tags_no_common(self):
         """Test getting common tags when none are common."""
@@ -100,8 +87,7 @@ class TestTextBlockCommonTags:
         ]
         block = text_block(chunks)
         common = block.get_common_tags()
-        assert len(common) == 1
-        assert common[0]["name"] == "b"
+        assert [tag["name"] for tag in common] == ["b"]
 
 
 class TestTextBlockTagOffsets:
@@ -113,9 +99,8 @@ class TestTextBlockTagOffsets:
         block = text_block(chunks)
         offsets = block.get_tag_offsets()
         # Only the bold chunk should have non-common tags
-        assert len(offsets) == 1
-        assert offsets[0]["start"] == 5  # After 'plain'
-        assert offsets[0]["length"] == 4  # Length of 'bold'
+        # Starts after 'plain', spans 'bold'
+        assert [(offset["start"], offset["length"]) for offset in offsets] == [(5, 4)]
 
     def test_get_tag_offsets_all_common(self):
         """Test tag offsets when all tags are common."""
@@ -124,7 +109,7 @@ class TestTextBlockTagOffsets:
         block = text_block(chunks)
         offsets = block.get_tag_offsets()
         # No non-common tags
-        assert len(offsets) == 0
+        assert offsets == []
 
     def test_get_tag_offsets_empty_text(self):
         """Test that empty text chunks are not included in offsets."""
@@ -132,7 +117,7 @@ class TestTextBlockTagOffsets:
         block = text_block(chunks)
         offsets = block.get_tag_offsets()
         # Empty chunk should be excluded
-        assert len(offsets) == 0
+        assert offsets == []
 
 
 class TestTextBlockGetTextChunkAt:
@@ -168,6 +153,13 @@ class TestTextBlockGetTextChunkAt:
         chunk = block.get_text_chunk_at(0)
         assert chunk.text == "hello"
 
+    def test_get_text_chunk_at_last_chunk(self):
+        """Test offsets inside the last chunk return the last chunk."""
+        chunks = [text_chunk("hello", []), text_chunk("", []), text_chunk(" world", [])]
+        block = text_block(chunks)
+        assert block.get_text_chunk_at(5) is chunks[2]
+        assert block.get_text_chunk_at(8) is chunks[2]
+
 
 class TestTextBlockGetTagForId:
     """Test get_tag_for_id method."""
@@ -214,3 +206,57 @@ class TestTextBlockGetPlainText:
         chunks = [text_chunk("", [])]
         block = text_block(chunks)
         assert block.get_plain_text() == ""
+
+    def test_get_plain_text_reused(self):
+        """Test that the plain text is built once and reused."""
+        block = text_block([text_chunk("hello", []), text_chunk(" world", [])])
+        assert block.get_plain_text() is block.get_plain_text()
+
+
+class TestTextBlockTranslateTags:
+    """Test translate_tags method."""
+
+    def test_translate_tags_applies_source_tags(self):
+        """Test that tags from the source ranges are copied to the target text."""
+        bold = {"name": "b", "attributes": {}}
+        block = text_block([text_chunk("Hello ", []), text_chunk("world", [bold])])
+        range_mappings = [
+            {"source": {"start": 0, "length": 5}, "target": {"start": 0, "length": 7}},
+            {"source": {"start": 6, "length": 5}, "target": {"start": 8, "length": 5}},
+        ]
+        translated = block.translate_tags("Bonjour monde", range_mappings)
+        assert translated.get_html() == "Bonjour <b>monde</b>"
+
+    def test_translate_tags_keeps_empty_chunks(self):
+        """Test that empty chunks are placed at the end of the range that contains them."""
+        br = {"name": "br", "attributes": {}, "isSelfClosing": True}
+        block = text_block([text_chunk("Hello ", []), text_chunk("", [], br), text_chunk("world", [])])
+        range_mappings = [
+            {"source": {"start": 0, "length": 5}, "target": {"start": 0, "length": 7}},
+            {"source": {"start": 6, "length": 5}, "target": {"start": 8, "length": 5}},
+        ]
+        translated = block.translate_tags("Bonjour monde", range_mappings)
+        assert translated.get_html() == "Bonjour monde<br />"
+
+    def test_translate_tags_trailing_whitespace(self):
+        """Test that unmapped trailing text and whitespace use the common tags."""
+        italic = {"name": "i", "attributes": {}}
+        block = text_block([text_chunk("Hello", [italic])])
+        range_mappings = [{"source": {"start": 0, "length": 5}, "target": {"start": 0, "length": 7}}]
+        translated = block.translate_tags("Bonjour le monde  ", range_mappings)
+        assert [chunk.text for chunk in translated.text_chunks] == ["Bonjour", " le monde", "  "]
+        assert translated.get_html() == "<i>Bonjour le monde  </i>"
+
+
+class TestTextBlockSegment:
+    """Test segment method."""
+
+    def test_segment_splits_inside_chunk(self):
+        """Test that boundaries inside one chunk split it without repeating text."""
+        bold = {"name": "b", "attributes": {}}
+        block = text_block([text_chunk("One. Two. Three.", [bold])])
+        ids = iter(range(100))
+        segmented = block.segment(lambda text: [0, 5, 10], lambda id_type: str(next(ids)))
+        assert segmented.get_plain_text() == "One. Two. Three."
+        assert [chunk.text for chunk in segmented.text_chunks] == ["One. ", "Two. ", "Three."]
+        assert all(chunk.tags[0] is bold for chunk in segmented.text_chunks)
@@ -2,9 +2,6 @@
 Unit tests for lineardoc/text_chunk.py module.
 """
 
-import os
-import sys
-
 import pytest
 from python.lib.lineardoc.text_chunk import text_chunk
 
@@ -55,21 +52,13 @@ class TestTextChunk:
         """Test text_chunk with nested tag structure."""
         tags = [{"name": "b"}, {"name": "i"}, {"name": "u"}]
         chunk = text_chunk("formatted", tags)
-        assert len(chunk.tags) == 3
-        assert chunk.tags[0]["name"] == "b"
-        assert chunk.tags[1]["name"] == "i"
-        assert chunk.tags[2]["name"] == "u"
+        assert [tag["name"] for tag in chunk.tags] == ["b", "i", "u"]
 
-    def test_text_chunk_unicode_text(self):
+    @pytest.mark.parametrize("text", ["مرحبا العالم", "こんにちは世界", "Hello 🌍"])
+    def test_text_chunk_unicode_text(self, text):
         """Test text_chunk with Unicode text."""
-        chunk = text_chunk("مرحبا العالم", [])
-        assert chunk.text == "مرحبا العالم"
-
-        chunk2 = text_chunk("こんにちは世界", [])
-        assert chunk2.text == "こんにちは世界"
-
-        chunk3 = text_chunk("Hello 🌍", [])
-        assert chunk3.text == "Hello 🌍"
+        chunk = text_chunk(text, [])
+        assert chunk.text == text
 
     def test_text_chunk_special_characters(self):
         """Test text_chunk with special characters."""
@@ -2,13 +2,15 @@
 Unit tests for lineardoc/utils.py module.
 """
 
-import os
-import sys
-
 import pytest
 from python.lib.lineardoc import utils
 from python.lib.lineardoc.text_chunk import text_chunk
 
+# Single-pass reference mappings: the chained replaces in esc/esc_attr must agree with these
+ESC_TABLE = str.maketrans({"&": "&#38;", "<": "&#60;", ">": "&#62;"})
+ESC_ATTR_TABLE = str.maketrans({"&": "&#38;", "<": "&#60;", ">": "&#62;", '"': "&#34;", "'": "&#39;"})
+ESCAPE_SAMPLES = ["", "hello", "<div>&a</div>", "a&b<c>d", "&#38;", "&amp;&lt;", "\"'&<>\x00"]
+
 
 class TestEscapeFunctions:
     """Test HTML escape functions."""
@@ -29,6 +31,16 @@ class TestEscapeFunctions:
         """Test escaping empty string."""
         assert utils.esc("") == ""
 
+    @pytest.mark.parametrize("text", ESCAPE_SAMPLES)
+    def test_esc_matches_single_pass_mapping(self, text):
+        """Test that esc maps each character independently, without re-escaping its own output."""
+        assert utils.esc(text) == text.translate(ESC_TABLE)
+
+    @pytest.mark.parametrize("text", ESCAPE_SAMPLES)
+    def test_esc_attr_matches_single_pass_mapping(self, text):
+        """Test that esc_attr maps each character independently, without re-escaping its own output."""
+        assert utils.esc_attr(text) == text.translate(ESC_ATTR_TABLE)
+
     def test_esc_attr_basic(self):
         """Test attribute escaping."""
         assert utils.esc_attr("hello") == "hello"
@@ -71,17 +83,21 @@ class TestTagHtmlGeneration:
         """Test generating open tag with special characters in attributes."""
         tag = {"name": "div", "attributes": {"data-value": '<test & "value">'}}
         result = utils.get_open_tag_html(tag)
-        # Note: esc_attr double-escapes & in numeric entities
-        assert '<div data-value="' in result
-        assert "&#60;test" in result  # <
-        assert "&#38;" in result  # &
-        assert "&#62;" in result  # >
+        assert result == '<div data-value="&#60;test &#38; &#34;value&#34;&#62;">'
 
     def test_get_open_tag_html_self_closing(self):
         """Test generating self-closing tag."""
         tag = {"name": "br", "isSelfClosing": True}
         assert utils.get_open_tag_html(tag) == "<br />"
 
+    def test_get_open_tag_html_cached_until_links_set(self):
+        """Test that the rendered open tag is cached and dropped when link ids are set."""
+        tag = {"name": "a", "attributes": {"href": "./Foo", "rel": "mw:WikiLink"}}
+        first = utils.get_open_tag_html(tag)
+        assert utils.get_open_tag_html(tag) is first
+        utils.set_link_ids_in_place([text_chunk("Foo", [tag])], lambda id_type: "7")
+        assert utils.get_open_tag_html(tag) == '<a class="cx-link" data-linkid="7" href="./Foo" rel="mw:WikiLink">'
+
     def test_get_close_tag_html_simple(self):
         """Test generating simple close tag."""
         tag = {"name": "div"}
@@ -174,6 +190,56 @@ class TestTagTypeDetection:
         tag = {"name": "div", "attributes": {"class": "normal"}}
         assert utils.is_transclusion(tag) is False
 
+    def test_is_non_translatable(self):
+        """Test detecting non-translatable tags by name, rel and typeof."""
+        assert utils.is_non_translatable({"name": "style", "attributes": {}}) is True
+        assert utils.is_non_translatable({"name": "span", "attributes": {"typeof": "mw:Entity"}}) is True
+        assert utils.is_non_translatable({"name": "a", "attributes": {"rel": "nofollow mw:Entity"}}) is True
+        assert utils.is_non_translatable({"name": "span", "attributes": {"class": "x", "typeof": "mw:File"}}) is False
+        assert utils.is_non_translatable({"name": "span", "attributes": {}}) is False
+
+    def test_is_external_link_rel_tokens(self):
+        """Test that external links are matched on whole rel tokens."""
+        assert utils.is_external_link({"name": "a", "attributes": {"rel": "nofollow mw:ExtLink"}}) is True
+        assert utils.is_external_link({"name": "a", "attributes": {"rel": "mw:ExtLinkFoo"}}) is False
+        assert utils.is_external_link({"name": "span", "attributes": {"rel": "mw:ExtLink"}}) is False
+
+
+class Testget_chunk_boundary_groups:
+    """Test get_chunk_boundary_groups function."""
+
+    def test_boundaries_grouped_by_chunk(self):
+        """Test that boundaries go to the chunk whose interior holds them."""
+        chunks = ["abc", "", "defg", "hi"]
+        groups = utils.get_chunk_boundary_groups([7, 0, 3, 4, 9], chunks, len)
+        assert [g["chunk"] for g in groups] == chunks
+        # 0 is the start of the first chunk; 3 falls between chunks, so it goes to "defg"
+        assert [g["boundaries"] for g in groups] == [[], [], [3, 4], [7]]
+
+
+class Testadd_common_tag:
+    """Test add_common_tag function."""
+
+    def test_add_common_tag_inside_shared_tags(self):
+        """Test that the tag goes below the tags all chunks share."""
+        bold = {"name": "b", "attributes": {}}
+        link = {"name": "a", "attributes": {}}
+        segment = {"name": "span", "attributes": {"class": "cx-segment"}}
+        chunks = [text_chunk("One", [bold, link]), text_chunk("Two", [bold])]
+        result = utils.add_common_tag(chunks, segment)
+        assert result[0].tags == [bold, segment, link]
+        assert result[1].tags == [bold, segment]
+
+    def test_add_common_tag_chunk_without_tags(self):
+        """Test that a chunk with no tags leaves no common tags."""
+        style = {"name": "style", "attributes": {}}
+        segment = {"name": "span", "attributes": {"class": "cx-segment"}}
+        chunks = [text_chunk("One", [style]), text_chunk("Two", [])]
+        result = utils.add_common_tag(chunks, segment)
+        assert result[0].tags == [segment, style]
+        assert result[1].tags == [segment]
+        assert chunks[0].tags == [style]
+
 
 class Testdump_tags:
     """Test dump_tags function."""
@@ -187,11 +253,10 @@ class Testdump_tags:
         """Test dumping single tag."""
         tags = [{"name": "b"}]
         result = utils.dump_tags(tags)
-        assert "b" in result
+        assert result == "b"
 
     def test_dump_tags_multiple(self):
         """Test dumping multiple tags."""
         tags = [{"name": "b"}, {"name": "i", "attributes": {"class": "test"}}]
         result = utils.dump_tags(tags)
-        assert "b" in result
-        assert "i" in result
+        assert result == "b i:class=test"